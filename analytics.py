@@ -0,0 +1,397 @@
+import os
+import re
+import json
+import array
+import datetime
+import argparse
+from bs4 import BeautifulSoup
+
+try:  # tables of many leagues are much faster with NumPy
+    import numpy
+except ImportError:
+    numpy = None
+
+RESULT_TYPES = ('regular', 'penalties', 'forfeit')
+PENALTIES = RESULT_TYPES.index('penalties')
+FORFEIT = RESULT_TYPES.index('forfeit')
+WIN = 3  # points
+DRAW = 1  # also for game decided by penalties, winner isn't in games.json
+EPOCH = datetime.datetime(1970, 1, 1)
+SCORE = re.compile(r'(\d+)\s*:\s*(\d+)')
+SIDES = ('all', 'home', 'away')
+COLUMNS = ('competition', 'round', 'minute', 'home', 'away', 'home_score',
+           'away_score', 'result_type')
+
+
+def minutes(when) -> int:
+    """
+    minutes since 1970 of ISO string or datetime, datetime.date means
+    the end of the day
+    """
+    if isinstance(when, str):
+        when = datetime.datetime.fromisoformat(when)
+    elif not isinstance(when, datetime.datetime):  # whole day
+        when = datetime.datetime.combine(when, datetime.time(23, 59))
+    return int((when - EPOCH).total_seconds()) // 60
+
+
+class Games:
+    """
+    Games of any number of leagues in columns (one item for each game),
+    NumPy arrays if it is installed, else array.array.
+    Teams are numbered from 0, teams[code] is team id (or name, if games
+    are without team ids) and names[code] its name.
+    """
+
+    def __init__(self, games):
+        self.teams = []
+        self.names = []
+        self.codes = {}  # team id -> code
+        columns = {name: [] for name in COLUMNS}
+        for match_info in games:
+            columns['competition'].append(match_info["competition_id"])
+            columns['round'].append(match_info["round"])
+            columns['minute'].append(minutes(match_info["datetime"]))
+            for side in ('home', 'away'):
+                columns[side].append(self.code(
+                    match_info.get(side + '_team_id'),
+                    match_info[side + '_team']))
+                columns[side + '_score'].append(
+                    int(match_info[side + '_score']))
+            columns['result_type'].append(
+                RESULT_TYPES.index(match_info["result_type"]))
+        for name, values in columns.items():
+            typecode = 'q' if name == 'minute' else 'l'
+            setattr(self, name, numpy.array(values, dtype=typecode)
+                    if numpy is not None else array.array(typecode, values))
+        self.leagues = {}  # competition id -> indexes of its games
+        for i, competition in enumerate(columns['competition']):
+            self.leagues.setdefault(competition, []).append(i)
+        self.team_games = [[] for _ in self.teams]  # code -> indexes
+        for i, (home, away) in enumerate(zip(columns['home'],
+                                             columns['away'])):
+            self.team_games[home].append(i)
+            self.team_games[away].append(i)
+        if numpy is not None:
+            self.leagues = {competition: numpy.array(index, dtype=int)
+                            for competition, index in self.leagues.items()}
+            self.team_games = [numpy.array(index, dtype=int)
+                               for index in self.team_games]
+
+    def code(self, team_id, name: str) -> int:
+        key = str(team_id) if team_id is not None else name
+        if key not in self.codes:
+            self.codes[key] = len(self.teams)
+            self.teams.append(key)
+            self.names.append(name)
+        return self.codes[key]
+
+    def __len__(self) -> int:
+        return len(self.round)
+
+    def select(self, competition=None, round=None, until=None,
+               team: int = None) -> list:
+        """
+        indexes of games of the competition (and of the team with the code),
+        up to the round and time
+        """
+        limit = minutes(until) if until is not None else None
+        if team is not None:  # only games of the team are checked
+            index = self.team_games[team]
+            if competition is not None:
+                index = [i for i in index
+                         if self.competition[i] == int(competition)]
+        elif competition is not None:
+            index = self.leagues.get(int(competition), [])
+        else:
+            index = range(len(self))
+        if numpy is not None:
+            index = numpy.asarray(index, dtype=int)
+            mask = numpy.ones(len(index), dtype=bool)
+            if round is not None:
+                mask &= self.round[index] <= round
+            if limit is not None:
+                mask &= self.minute[index] <= limit
+            return index[mask]
+        return [i for i in index
+                if (round is None or self.round[i] <= round)
+                and (limit is None or self.minute[i] <= limit)]
+
+
+def load_leagues(folders: list) -> Games:
+    """Games from games.json of the league folders"""
+    games = []
+    for folder in folders:
+        with open(os.path.join(folder, 'games.json')) as file:
+            games.extend(json.load(file).values())
+    return Games(games)
+
+
+def team_rows(games: Games, index, side: str = 'all') -> tuple:
+    """
+    one row for each team in each game: (team, opponent, goals for,
+    goals against, result type, minute), as columns
+    """
+    if side not in SIDES:
+        raise ValueError(f'side must be one of {", ".join(SIDES)}')
+    parts = []
+    if side in ('all', 'home'):
+        parts.append((games.home, games.away, games.home_score,
+                      games.away_score))
+    if side in ('all', 'away'):
+        parts.append((games.away, games.home, games.away_score,
+                      games.home_score))
+    if numpy is not None:
+        return tuple(numpy.concatenate([part[i][index] for part in parts])
+                     for i in range(4)) + (
+            numpy.concatenate([games.result_type[index]] * len(parts)),
+            numpy.concatenate([games.minute[index]] * len(parts)))
+    rows = [[] for _ in range(6)]
+    for part in parts:
+        for i in index:
+            for column, values in zip(rows, part + (games.result_type,
+                                                    games.minute)):
+                column.append(values[i])
+    return tuple(rows)
+
+
+def sum_rows(games: Games, team, gf, ga, result_type) -> list:
+    """table rows from rows of team_rows(), only teams which played"""
+    if numpy is not None:
+        codes, team = numpy.unique(team, return_inverse=True)
+
+        def count(values=None):
+            return numpy.bincount(team, values,
+                                  minlength=len(codes)).astype(int)
+
+        won, drawn, lost = gf > ga, gf == ga, gf < ga
+        totals = zip(codes, zip(count(), count(won), count(drawn),
+                                count(lost), count(gf), count(ga),
+                                count(result_type == PENALTIES),
+                                count(result_type == FORFEIT)))
+    else:
+        sums = {}
+        for code, goals_for, goals_against, kind in zip(team, gf, ga,
+                                                        result_type):
+            total = sums.setdefault(code, [0] * 8)
+            total[0] += 1
+            total[1 if goals_for > goals_against else
+                  2 if goals_for == goals_against else 3] += 1
+            total[4] += goals_for
+            total[5] += goals_against
+            total[6] += kind == PENALTIES
+            total[7] += kind == FORFEIT
+        totals = sums.items()
+    rows = []
+    for code, (played, won, drawn, lost, goals_for, goals_against,
+               penalties, forfeits) in totals:
+        rows.append({
+            "team_id": games.teams[code], "team_name": games.names[code],
+            "played": int(played), "won": int(won), "drawn": int(drawn),
+            "lost": int(lost), "goals_for": int(goals_for),
+            "goals_against": int(goals_against),
+            "points": int(WIN * won + DRAW * drawn),
+            "penalties": int(penalties), "forfeits": int(forfeits),
+        })
+    return sort_table(rows)
+
+
+def sort_table(rows: list) -> list:
+    """order by points, goal difference, goals scored and name"""
+    rows.sort(key=lambda row: (-row["points"],
+                               row["goals_against"] - row["goals_for"],
+                               -row["goals_for"], row["team_name"]))
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+
+def league_table(games: Games, competition=None, round: int = None,
+                 until=None, side: str = 'all') -> list:
+    """
+    table of the league after the round (or at time until) as list of dicts,
+    side 'home' or 'away' counts only home or away games. Game decided
+    by penalties is a draw, forfeit counts with its score (3:0)
+    """
+    index = games.select(competition, round, until)
+    team, _, gf, ga, result_type, _ = team_rows(games, index, side)
+    return sum_rows(games, team, gf, ga, result_type)
+
+
+def form_table(games: Games, last: int = 5, competition=None,
+               round: int = None, until=None) -> list:
+    """
+    table of the last games of each team (up to the round or time),
+    with "form" - results of the games from the oldest, e.g. 'WDLWW'
+    """
+    index = games.select(competition, round, until)
+    team, _, gf, ga, result_type, minute = team_rows(games, index)
+    if numpy is not None:
+        order = numpy.lexsort((minute, team))  # by team, then by time
+        team, gf, ga = team[order], gf[order], ga[order]
+        result_type = result_type[order]
+        ends = numpy.cumsum(numpy.bincount(team,
+                                           minlength=len(games.teams)))
+        keep = ends[team] - numpy.arange(len(team)) <= last
+        team, gf, ga = team[keep], gf[keep], ga[keep]
+        result_type = result_type[keep]
+    else:
+        rows = sorted(zip(team, minute, gf, ga, result_type))
+        kept = []
+        for i, row in enumerate(rows):
+            if i + last >= len(rows) or rows[i + last][0] != row[0]:
+                kept.append(row)
+        team, gf, ga, result_type = ([row[i] for row in kept]
+                                     for i in (0, 2, 3, 4))
+    forms = {}
+    for code, goals_for, goals_against in zip(team, gf, ga):
+        forms[code] = forms.get(code, '') + (
+            'W' if goals_for > goals_against else
+            'D' if goals_for == goals_against else 'L')
+    rows = sum_rows(games, team, gf, ga, result_type)
+    for row in rows:
+        row["form"] = forms[games.codes[row["team_id"]]]
+    return rows
+
+
+def head_to_head(games: Games, team_a: str, team_b: str,
+                 competition=None, until=None) -> dict:
+    """
+    games between two teams (ids, or names for games without ids)
+    and their record from the view of team_a
+    """
+    a, b = games.codes[str(team_a)], games.codes[str(team_b)]
+    index = games.select(competition, None, until, team=a)
+    if numpy is not None:
+        home, away = games.home[index], games.away[index]
+        index = index[((home == a) & (away == b))
+                      | ((home == b) & (away == a))]
+        index = index[numpy.argsort(games.minute[index], kind='stable')]
+    else:
+        index = sorted((i for i in index
+                        if {games.home[i], games.away[i]} == {a, b}),
+                       key=lambda i: games.minute[i])
+    team, _, gf, ga, result_type, _ = team_rows(games, index)
+    record = next((row for row in sum_rows(games, team, gf, ga, result_type)
+                   if row["team_id"] == games.teams[a]), None)
+    matches = [{
+        "datetime": (EPOCH + datetime.timedelta(
+            minutes=int(games.minute[i]))).isoformat(),
+        "competition_id": int(games.competition[i]),
+        "home_team": games.names[games.home[i]],
+        "away_team": games.names[games.away[i]],
+        "score": f'{games.home_score[i]}:{games.away_score[i]}',
+        "result_type": RESULT_TYPES[games.result_type[i]],
+    } for i in index]
+    return {"record": record, "matches": matches}
+
+
+def read_table(content: bytes) -> list:
+    """
+    rows of the table on "Tabulka" page: team_id, team_name, rank,
+    and played, goals_for, goals_against and points if the page has them
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    page_content = soup.find('div', {'id': 'content'})
+    rows = []
+    for tr in page_content.table.find_all('tr'):
+        link = tr.find('a', href=True)
+        if not link:
+            continue
+        row = {"team_id": link['href'].rstrip('/').split('/')[-1],
+               "team_name": link.text.strip(), "rank": len(rows) + 1}
+        cells = tr.find_all('td')
+        team_cell = link.find_parent('td')  # numbers are after it
+        start = next((num + 1 for num, cell in enumerate(cells)
+                      if cell is team_cell), 0)
+        numbers = []
+        for cell in (cell.text.strip() for cell in cells[start:]):
+            score = SCORE.fullmatch(cell)
+            if score:
+                row["goals_for"], row["goals_against"] = map(
+                    int, score.groups())
+                row["played"] = numbers[0] if numbers else None
+                numbers = []
+            elif cell.isdigit():
+                numbers.append(int(cell))
+        if "goals_for" in row and numbers:
+            row["points"] = numbers[0]
+        rows.append({key: value for key, value in row.items()
+                     if value is not None})
+    return rows
+
+
+def check_table(games: Games, content: bytes, competition) -> list:
+    """
+    compare league_table() of all games with "Tabulka" page, return
+    differences as text, empty list if they are the same
+    """
+    table = {row["team_id"]: row
+             for row in league_table(games, competition)}
+    by_name = {row["team_name"]: row for row in table.values()}
+    differences = []
+    for page_row in read_table(content):
+        row = table.get(page_row["team_id"],
+                        by_name.get(page_row["team_name"]))
+        if row is None:
+            differences.append(f'{page_row["team_name"]}: no games')
+            continue
+        for key, value in page_row.items():
+            if key not in ("team_id", "team_name") and row[key] != value:
+                differences.append(f'{page_row["team_name"]}: {key} is '
+                                   f'{row[key]}, on the page {value}')
+    return differences
+
+
+def print_table(rows: list) -> None:
+    for row in rows:
+        print(f'{row["rank"]:3}. {row["team_name"][:25]:25} '
+              f'{row["played"]:3} {row["won"]:3} {row["drawn"]:3} '
+              f'{row["lost"]:3} {row["goals_for"]:4}:{row["goals_against"]:<4}'
+              f'{row["points"]:4}  {row.get("form", "")}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Print table of a league from its games.json, after any round.""")
+    parser.add_argument("folders", nargs='+', help="folders of leagues")
+    parser.add_argument("--competition", help="league id, if there are more")
+    parser.add_argument("--round", type=int, help="table after this round")
+    parser.add_argument("--side", choices=SIDES,
+                        default='all', help="only home or away games")
+    parser.add_argument("--form", type=int, metavar="GAMES",
+                        help="table of the last GAMES games of each team")
+    parser.add_argument("--h2h", nargs=2, metavar="TEAM",
+                        help="games between two teams (ids)")
+    parser.add_argument("--check", metavar="FOLDER",
+                        help="compare tables with Tabulka pages recorded "
+                             "by scraper.py --record FOLDER")
+    arguments = parser.parse_args()
+
+    all_games = load_leagues(arguments.folders)
+    if arguments.h2h:
+        result = head_to_head(all_games, *arguments.h2h,
+                              arguments.competition)
+        for match in result["matches"]:
+            print(f'{match["datetime"]} {match["home_team"]} - '
+                  f'{match["away_team"]} {match["score"]}')
+        if result["record"]:
+            print_table([result["record"]])
+    elif arguments.check:
+        for folder in arguments.folders:
+            id_league = os.path.basename(os.path.normpath(folder))
+            page = os.path.join(arguments.check, 'soutez', 'tabulka',
+                                id_league, 'index.html')
+            with open(page, 'rb') as file:
+                differences = check_table(all_games, file.read(), id_league)
+            print(f'League {id_league}: ' + (
+                'table is the same' if not differences else
+                f'{len(differences)} differences'))
+            for difference in differences:
+                print('   ', difference)
+    elif arguments.form:
+        print_table(form_table(all_games, arguments.form,
+                               arguments.competition, arguments.round))
+    else:
+        print_table(league_table(all_games, arguments.competition,
+                                 arguments.round, side=arguments.side))
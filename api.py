@@ -0,0 +1,91 @@
+import datetime
+import utils
+from client import Client, FetchError, default_client
+
+MAIN_LINK = "https://fotbalunas.cz"
+PATH = "/soutez/"
+
+
+class LeagueNotFound(FetchError):
+    """page of the league was downloaded, but the league doesn't exist"""
+
+    def __init__(self, link: str):
+        super().__init__(link, "league probably doesn't exist")
+
+
+def ignore(message: str) -> None:
+    """default callback, library doesn't print anything"""
+
+
+def league_links(league_id, client: Client, site: str = MAIN_LINK) -> dict:
+    """return links of table ("Tabulka") and schedule ("Rozlosování") page"""
+    league_link = site + PATH + str(league_id) + '/'
+    r = client.get(league_link, 'league')
+    soup = utils.make_soup(r.content, utils.LEAGUE_MENU)
+    league_tag = soup.header and soup.header.find('div', {
+        'class': 'secondary-menu secondary-menu-soutez'})
+    if not league_tag:
+        raise LeagueNotFound(league_link)
+    return {"table": site + league_tag.find('a', string="Tabulka")['href'],
+            "schedule": site + league_tag.find('a',
+                                               string="Rozlosování")['href']}
+
+
+def schedule_link(league_id, client: Client, site: str = MAIN_LINK) -> str:
+    """return link of schedule page ("Rozlosování") of the league"""
+    return league_links(league_id, client, site)["schedule"]
+
+
+def in_range(game: dict, since=None, until=None) -> bool:
+    """
+    True if game from get_schedule() takes place between since and until,
+    both included. Limits are datetime.date (whole day)
+    or datetime.datetime, None means no limit.
+    """
+    if since is None and until is None:
+        return True
+    if "datetime" not in game:  # cancelled game without date
+        return False
+    when = datetime.datetime.fromisoformat(game["datetime"])
+    for limit, after in ((since, True), (until, False)):
+        if limit is None:
+            continue
+        value = when if isinstance(limit, datetime.datetime) else when.date()
+        if (value < limit) if after else (value > limit):
+            return False
+    return True
+
+
+def iter_league_matches(league_id, client: Client = None,
+                        site: str = MAIN_LINK, rounds=None, since=None,
+                        until=None, level: str = 'full', workers: int = 1,
+                        processes: int = 1, saved_games: dict = None,
+                        progress=ignore, warning=ignore):
+    """
+    Yield match_info (same dict as in games.json) of each game of the league
+    as soon as it is scraped, in the order of the schedule page.
+    Only games from rounds (any container of round numbers) and from since
+    to until (see in_range()) are scraped, pages of other games are never
+    downloaded. Stop early simply by leaving the loop, pages which are not
+    downloaded yet are not requested.
+    Messages for user are passed to progress() and warning() callbacks
+    instead of being printed. FetchError is raised if the league or schedule
+    page can't be downloaded, LeagueNotFound if the league doesn't exist.
+
+        for game in iter_league_matches(438, rounds=range(1, 6)):
+            save(game)
+    """
+    own_client = client is None
+    client = client or default_client()
+    try:
+        link = schedule_link(league_id, client, site.rstrip('/'))
+        schedule = utils.read_schedule(client.get(link, 'schedule').content,
+                                       link)
+        schedule = [game for game in schedule
+                    if (rounds is None or game["round"] in rounds)
+                    and in_range(game, since, until)]
+        yield from utils.iter_games(schedule, workers, client, saved_games,
+                                    level, processes, progress, warning)
+    finally:
+        if own_client:
+            client.close()
@@ -0,0 +1,204 @@
+import os
+import re
+import time
+import zlib
+import hashlib
+import sqlite3
+import argparse
+import threading
+from cache import CachedResponse
+from client import FetchError
+
+try:  # zstd compresses better and faster, zlib is used without it
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC = 'zstd' if zstandard else 'zlib'
+SEGMENT_SIZE = 64 * 2 ** 20  # new segment file is started after this size
+LEAGUE_PAGE = re.compile(r'/soutez/(\d+)/$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contents (
+    sha1 TEXT PRIMARY KEY,
+    segment INTEGER,
+    offset INTEGER,
+    length INTEGER,
+    size INTEGER,
+    codec TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT,
+    fetched REAL,
+    kind TEXT,
+    sha1 TEXT,
+    PRIMARY KEY (url, fetched)
+);
+"""
+
+
+def compress(content: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(content)
+    return zlib.compress(content, 9)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("page is compressed by zstd, install it with "
+                               "'pip install zstandard'")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class PageArchive:
+    """
+    Every version of every page the scraper got, compressed and appended
+    to segment files (folder/00001.pack, ...) and indexed by URL and fetch
+    time in folder/index.db. Content is stored only once, so page which
+    didn't change since the last fetch (or the same page under other URL)
+    takes just one row in the index.
+    Unlike PageCache nothing is ever deleted, so leagues can be parsed again
+    from the archive, e.g. when a parsing bug is fixed.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(folder, 'index.db'),
+                                  check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.latest = {  # url -> sha1 of the last version
+            url: sha1 for url, sha1, _ in self.db.execute(
+                'SELECT url, sha1, MAX(fetched) FROM pages GROUP BY url')}
+        self.segment = self.db.execute(
+            'SELECT MAX(segment) FROM contents').fetchone()[0] or 1
+        self.saved = 0  # new versions in this run
+        self._lock = threading.Lock()
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.folder, f'{segment:05}.pack')
+
+    def save(self, url: str, kind: str, content: bytes,
+             fetched: float = None) -> bool:
+        """
+        add new version of the page, False if the page didn't change since
+        its last version
+        """
+        sha1 = hashlib.sha1(content).hexdigest()
+        with self._lock:
+            if self.latest.get(url) == sha1:
+                return False
+            known = self.db.execute('SELECT 1 FROM contents WHERE sha1 = ?',
+                                    (sha1,)).fetchone()
+            with self.db:
+                if not known:
+                    self._append(sha1, content)
+                self.db.execute('INSERT OR REPLACE INTO pages '
+                                'VALUES (?, ?, ?, ?)',
+                                (url, fetched or time.time(), kind, sha1))
+            self.latest[url] = sha1
+            self.saved += 1
+            return True
+
+    def _append(self, sha1: str, content: bytes) -> None:
+        data = compress(content, CODEC)
+        path = self.segment_path(self.segment)
+        if os.path.exists(path) and os.path.getsize(path) >= SEGMENT_SIZE:
+            self.segment += 1
+            path = self.segment_path(self.segment)
+        with open(path, 'ab') as file:
+            offset = file.tell()
+            file.write(data)
+        self.db.execute('INSERT INTO contents VALUES (?, ?, ?, ?, ?, ?)',
+                        (sha1, self.segment, offset, len(data), len(content),
+                         CODEC))
+
+    def get(self, url: str, at: float = None) -> bytes:
+        """
+        content of the page as it was at time `at` (the last version
+        fetched before), by default the last version. None if it isn't there
+        """
+        with self._lock:
+            row = self.db.execute(
+                'SELECT segment, offset, length, codec FROM pages '
+                'JOIN contents USING (sha1) WHERE url = ? AND fetched <= ? '
+                'ORDER BY fetched DESC LIMIT 1',
+                (url, at if at is not None else float('inf'))).fetchone()
+        if row is None:
+            return None
+        segment, offset, length, codec = row
+        with open(self.segment_path(segment), 'rb') as file:
+            file.seek(offset)
+            return decompress(file.read(length), codec)
+
+    def versions(self, url: str) -> list:
+        """fetch times of all versions of the page"""
+        with self._lock:
+            return [row[0] for row in self.db.execute(
+                'SELECT fetched FROM pages WHERE url = ? ORDER BY fetched',
+                (url,))]
+
+    def leagues(self) -> list:
+        """ids of leagues which pages are in the archive"""
+        with self._lock:
+            urls = [row[0] for row in self.db.execute(
+                "SELECT url FROM pages WHERE kind = 'league' "
+                "GROUP BY url ORDER BY MIN(rowid)")]
+        return [match.group(1) for match in map(LEAGUE_PAGE.search, urls)
+                if match]
+
+    def summary(self) -> str:
+        with self._lock:
+            versions, urls = self.db.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT url) FROM pages').fetchone()
+            size, stored = self.db.execute(
+                'SELECT TOTAL(size), TOTAL(length) FROM contents').fetchone()
+        return (f'Archive: {urls} pages, {versions} versions, '
+                f'{size / 2 ** 20:.1f} MB stored in {stored / 2 ** 20:.1f} MB'
+                f', {self.saved} new versions')
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class ArchiveClient:
+    """
+    Client which takes pages only from PageArchive, never from network.
+    Page which isn't in the archive raises FetchError as if it couldn't be
+    downloaded.
+    """
+
+    def __init__(self, archive: PageArchive, at: float = None):
+        self.archive = archive
+        self.at = at
+        self.requests = self.retried = self.errors = 0
+
+    def get(self, link: str, kind: str = 'page',
+            fresh: bool = False) -> CachedResponse:
+        content = self.archive.get(link, self.at)
+        if content is None:
+            self.errors += 1
+            raise FetchError(link, 'not in the archive')
+        return CachedResponse(link, content)
+
+    def close(self) -> None:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Print what is in the archive of pages made by scraper.py --archive.""")
+    parser.add_argument("folder")
+    parser.add_argument("--url", help="print fetch times of versions "
+                                      "of this page")
+    arguments = parser.parse_args()
+
+    page_archive = PageArchive(arguments.folder)
+    print(page_archive.summary())
+    print('Leagues:', ' '.join(page_archive.leagues()))
+    if arguments.url:
+        for fetched in page_archive.versions(arguments.url):
+            print(time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(fetched)))
+    page_archive.close()
@@ -0,0 +1,829 @@
+import io
+import re
+import json
+import time
+import random
+import datetime
+import resource
+import argparse
+from contextlib import redirect_stdout
+import utils
+import lexer
+import scraper
+import fixtures
+import analytics
+from client import Client
+from scheduler import HostScheduler, AdaptiveScheduler
+from standin import StandInServer
+
+DUMMY_LINK = 'https://fotbalunas.cz/soutez/rozlosovani/0/'
+DUMMY_GAME = {"match_id": 0, "competition_id": 0, "round": 0, "datetime": '',
+              "score": '', "half_time_score": '', "result_type": 'regular',
+              "home_score": 0, "away_score": 0}
+
+
+def extract_league(soup):
+    return str(soup.header.find('div', {
+        'class': 'secondary-menu secondary-menu-soutez'}))
+
+
+def extract_table(soup):
+    with redirect_stdout(io.StringIO()):
+        basic_info = utils.get_basic_info(soup, DUMMY_LINK)
+    del basic_info["updated"]
+    return basic_info
+
+
+def extract_schedule(soup):
+    return utils.get_schedule(soup, DUMMY_LINK)
+
+
+def extract_match(soup):
+    with redirect_stdout(io.StringIO()):
+        return utils.scrap_match_detail(soup, DUMMY_GAME)
+
+
+# page kind: (function which makes soup the old way, the new way, extractor)
+PAGE_KINDS = {
+    "league": (lambda content: utils.make_soup(content),
+               lambda content: utils.make_soup(content, utils.LEAGUE_MENU),
+               extract_league),
+    "table": (lambda content: utils.make_soup(content),
+              lambda content: utils.make_soup(content, utils.PAGE_CONTENT),
+              extract_table),
+    "schedule": (lambda content: utils.make_soup(content),
+                 lambda content: utils.make_soup(content, utils.PAGE_CONTENT),
+                 extract_schedule),
+    "match": (lambda content: utils.make_soup(content),
+              lambda content: utils.make_match_soup(content, DUMMY_GAME),
+              extract_match),
+}
+
+
+def time_parse(kind: str, contents: list, parser: str,
+               repeat: int = 3) -> tuple:
+    """
+    parse all pages of the kind the old way (whole page with html.parser)
+    and the new way (only needed parts with the parser).
+    Return tuple (old seconds per page, new seconds per page, same output)
+    """
+    full, targeted, extract = PAGE_KINDS[kind]
+    old_parser = utils.HTML_PARSER
+    results = []
+    for make, used_parser in ((full, 'html.parser'),
+                              (targeted, parser)):
+        utils.HTML_PARSER = used_parser
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = [extract(make(content)) for content in contents]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.append((best / len(contents), output))
+    utils.HTML_PARSER = old_parser
+    (old, old_output), (new, new_output) = results
+    return old, new, old_output == new_output
+
+
+def print_parse_times(pages: dict, parser: str) -> None:
+    """pages is dict {kind: [content, ...]}"""
+    print(f'{"page":<10}{"pages":>6}{"old ms":>10}{"new ms":>10}'
+          f'{"speedup":>9}  output')
+    for kind, contents in pages.items():
+        if not contents:
+            continue
+        old, new, same = time_parse(kind, contents, parser)
+        print(f'{kind:<10}{len(contents):>6}{old * 1000:>10.2f}'
+              f'{new * 1000:>10.2f}{old / new:>8.1f}x  '
+              f'{"same" if same else "DIFFERENT"}')
+
+
+# extraction of lineups, cards and goals with regular expressions, which
+# lexer replaced, the benchmark compares it with lexer
+
+
+def nice_text(text: str) -> str:
+    """remove all tabs and newlines and '[-]' from text and strip it"""
+    text = re.sub(r"\s+", " ", text)
+    text = text.replace('[-]', '').strip()
+    return text
+
+
+def get_players_ids(tag) -> list:
+    """extract all players ids from tag"""
+    links = tag.find_all('a')
+    ids = [link['href'].split('/')[-2] for link in links]
+    return ids
+
+
+def match_card_info(ids: list, items: list, card_color: str) -> list:
+    """
+    match list with ids and list with card info,
+    and create list of dictionaries with complete card info
+    keys(player_id, name, minutes, card)
+     """
+    cards = []  # list of dict
+    for player_id, text in zip(ids, items):  # match each player id with card info
+
+        minute = re.search(r'(\d+)\.', text)
+        if not minute:  # on some games this info is missing
+            minute = '1'
+            name = text.strip()
+        else:
+            minute = minute.group(0).strip('.')
+            name = re.findall(r'\d+\.(.*)', text)[0].strip()
+        info = {'player_id': player_id,
+                'name': name,
+                'minute': minute,
+                'card': card_color
+                }
+        cards.append(info)
+    return cards
+
+
+def cards_received(tag) -> list:
+    """
+    Separate text into yellow cards and red cards. Get all players ids.
+    Use match_card_info() to match cards with ids
+    Return list of dicts with info about all cards received in this game.
+    If no tag, return empty list.
+    """
+    if not tag:
+        return []
+
+    text = nice_text(tag.text)
+    text = re.sub(r" \.", "", text)  # remove dot on the end
+
+    yellow_cards_index = text.find('ŽK:')
+    red_cards_index = text.find('ČK:')
+
+    if red_cards_index == -1:  # no red cards in this game,only yellow
+        text = text[yellow_cards_index + 3:]
+        items_y = re.split('[-,]', text)
+        items_r = []
+    else:
+        if yellow_cards_index != -1:  # yellow and red cards
+            text_yellow = text[yellow_cards_index + 3:red_cards_index]
+            text_red = text[red_cards_index + 3:]
+            items_y = re.split('[-,]', text_yellow)
+            items_r = re.split('[,-]', text_red)
+        else:  # only red cards in this game
+            text = text[red_cards_index + 3:]
+            items_y = []
+            items_r = re.split('[,-]', text)
+
+    ids = get_players_ids(tag)  # list of ids
+    ids_y = ids[:len(items_y)]  # ids which belongs to items_y
+    ids_r = ids[len(items_y):]  # ids which belongs to item_r
+
+    yellows = match_card_info(ids_y, items_y, "yellow")
+    reds = match_card_info(ids_r, items_r, "red")
+    cards = yellows + reds
+    return cards
+
+
+def get_goal_scorer(tag) -> list:
+    """
+    return list of all goal scorers as list of dicts
+    keys(player_id, name, minute, goal_type)
+    if no goals, return empty list
+    """
+    if not tag.div:  # no goals
+        return []
+
+    ids = get_players_ids(tag)
+    text = nice_text(tag.text).replace("Branky", '')
+    items = re.split("[-,]", text)
+
+    goals = []  # list of dicts
+    for player_id, text in zip(ids, items):  # match each goal with player id
+        # minute = re.findall('(\d+)\.',text)[0]
+        minute = re.search(r'(\d+)\.', text)
+        if not minute:  # on some games this info is missing
+            minute = '1'
+            name = text.strip()
+        else:
+            minute = minute.group(0).strip('.')
+            name = re.findall(r'\d+\.(.*)', text)[0].strip()
+
+        goal_type = 'regular'
+        if '(' in name:  # behind name is (p.) or (vl.)
+            name, goal_info = name.split('(')
+            name = name.strip()
+            if goal_info[0] == 'p':
+                goal_type = 'penalty'
+            elif goal_info[0] == 'v':
+                goal_type = 'own'
+            else:
+                goal_type = 'unknown'
+
+        info = {'player_id': player_id,
+                'name': name,
+                'minute': minute,
+                'goal_type': goal_type}
+
+        goals.append(info)
+
+    return goals
+
+
+def get_players(team: str, tag) -> list:
+    """
+    Takes team_name and tag of names with lineups.
+    If no tag given, return empty list.
+    Clean up text of tag, so we got 11 items.
+    If item has two players (base + subs),separate them.
+    Make new dictionary of each player with keys(id,name,role,minutes)
+    return list of dictionaries
+    """
+    if not tag:
+        print(f'Missing line up for {team} in the game bellow.')
+        return []
+
+    team_name_official = tag.strong.text
+    text = nice_text(tag.text)
+    text = text.replace(team_name_official, "").strip()  # remove team_name
+    # separate text into 11 items
+    items = text.split(',')
+    top11 = []
+    # sometimes happened that players are not separated with ',' but with '-'
+    # this loop flatten the items list and players will remain in same order
+    for item in items:
+        persons = item.split('- ')
+        for person in persons:
+            person = person.strip()
+            if person:
+                top11.append(person)
+
+    if len(top11) < 7:
+        print(f'Less than 7 players on {team} side. ',
+              'Game supposed to be canceled')
+        return []
+
+    ids = get_players_ids(tag)  # list of ids
+
+    # Make new dictionary of each player with keys(id,name,role,minutes)
+    lineup = []  # list of dict
+    i = 0
+    for player in top11:
+        if player.find('(') == -1:  # player got not subs, he played all game
+            played = 90
+            role = 'start'
+            info = {'player_id': ids[i], 'name': player,
+                    'role': role, 'minutes': played}
+            lineup.append(info)
+            i += 1
+
+        else:  # player got subs, he played did not played 90 minutes
+            players = player.split('(')
+            subs_minute = re.findall(r'(\d+)\.', players[1])[0]
+            player = players[0].strip()  # base player
+            played = int(subs_minute)
+            role = 'start'
+            info = {'player_id': ids[i], 'name': player, 'role': role,
+                    'minutes': played}
+            lineup.append(info)
+            i += 1
+
+            player = players[1]  # subs player
+            player = player.replace(subs_minute, '').replace('.', '', 1)
+            player = player.replace(')', '').strip()
+            played = 90 - int(subs_minute)
+            role = 'subs'
+            info = {'player_id': ids[i], 'name': player, 'role': role,
+                    'minutes': played}
+            lineup.append(info)
+            i += 1
+
+    return lineup
+
+
+def match_sections(contents: list) -> list:
+    """return list of (home team, away team, sections) of match pages"""
+    found = []
+    for content in contents:
+        soup = utils.make_match_soup(content, DUMMY_GAME)
+        tag_teams = soup.find_all('h2')[:2]
+        home_team, away_team = tag_teams[0].a.text, tag_teams[1].a.text
+        if not soup.find("h4", text="Sestavy"):  # forfeited game
+            continue
+        found.append((home_team, away_team, utils.get_match_sections(
+            soup, home_team, away_team)))
+    return found
+
+
+def old_lineups(home_team, away_team, sections):
+    try:
+        home = get_players(home_team, sections[0])
+    except IndexError:
+        home = []
+    try:
+        away = get_players(away_team, sections[1])
+    except IndexError:
+        away = []
+    return home, away
+
+
+# extracted data: (old function, new function from lexer)
+TOKEN_KINDS = {
+    "lineups": (old_lineups,
+                lambda home_team, away_team, sections: (
+                    lexer.lineup(home_team, sections[0]),
+                    lexer.lineup(away_team, sections[1]))),
+    "cards": (lambda home_team, away_team, sections:
+              cards_received(sections[2]),
+              lambda home_team, away_team, sections:
+              lexer.cards(sections[2])),
+    "goals": (lambda home_team, away_team, sections:
+              get_goal_scorer(sections[3]),
+              lambda home_team, away_team, sections:
+              lexer.goals(sections[3])),
+}
+
+
+def print_token_times(contents: list, repeat: int = 5) -> bool:
+    """
+    compare old extraction of lineups, cards and goals with lexer on match
+    pages, print time per page and return True if outputs are the same
+    """
+    pages = match_sections(contents)
+    print(f'{"data":<10}{"pages":>6}{"old ms":>10}{"new ms":>10}'
+          f'{"speedup":>9}  output')
+    all_same = True
+    for kind, functions in TOKEN_KINDS.items():
+        times = []
+        outputs = []
+        for function in functions:
+            best = None
+            with redirect_stdout(io.StringIO()):
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    output = [function(*page) for page in pages]
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+            times.append(best / max(1, len(pages)))
+            outputs.append(output)
+        same = outputs[0] == outputs[1]
+        all_same = all_same and same
+        print(f'{kind:<10}{len(pages):>6}{times[0] * 1000:>10.3f}'
+              f'{times[1] * 1000:>10.3f}{times[0] / times[1]:>8.1f}x  '
+              f'{"same" if same else "DIFFERENT"}')
+    return all_same
+
+
+def same_json(first, second) -> bool:
+    """compare data as they would be saved in JSON file, with the same order"""
+    return json.dumps(first) == json.dumps(second)
+
+
+def bench_leagues(folder: str, latency: float = 0, workers: int = 1,
+                  level: str = 'full', processes: int = 1,
+                  make_scheduler=None, **server_options) -> dict:
+    """
+    scrape all recorded leagues from folder served by local stand-in server
+    and return dict with results of the benchmark for each league.
+    Each league gets scheduler from make_scheduler() (default no limits),
+    server_options are passed to StandInServer, e.g. capacity.
+    """
+    make_scheduler = make_scheduler or (lambda: HostScheduler(0, 0))
+    stand_in = StandInServer(folder, latency=latency,
+                             **server_options).start()
+    scraper.MAIN_LINK = stand_in.url
+    results = {}
+    try:
+        for id_league, (golden_basic, golden_games) in \
+                fixtures.load_golden(folder).items():
+            host_scheduler = make_scheduler()
+            http_client = Client(pool_size=max(10, workers),
+                                 scheduler=host_scheduler)
+            requests_before = stand_in.requests
+            throttled_before = stand_in.throttled
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                basic_info, games = scraper.scrape_league(
+                    id_league, http_client, workers, level=level,
+                    processes=processes)
+            elapsed = time.perf_counter() - start
+            http_client.close()
+
+            pages = stand_in.requests - requests_before
+            del basic_info["updated"], golden_basic["updated"]
+            results[id_league] = {
+                "seconds": elapsed,
+                "pages": pages,
+                "pages_per_second": pages / elapsed,
+                "throttled": stand_in.throttled - throttled_before,
+                "missing_games": len(set(golden_games) -
+                                     {str(match_id) for match_id in games}),
+                "rates": getattr(host_scheduler, 'state', dict)(),
+                "same_basic": same_json(basic_info, golden_basic),
+                "same_games": same_json(games, golden_games),
+            }
+    finally:
+        stand_in.shutdown()
+        stand_in.server_close()
+    return results
+
+
+def print_politeness(folder: str, rate: float, concurrency: int,
+                     min_rate: float, workers: int, **server_options) -> None:
+    """
+    scrape recorded leagues from stand-in server, which slows down and
+    throttles, with fixed limits and with AdaptiveScheduler, print both
+    """
+    schedulers = {
+        "fixed": lambda: HostScheduler(rate, concurrency),
+        "adaptive": lambda: AdaptiveScheduler(rate, concurrency, min_rate),
+    }
+    print(f'{"scheduler":<10}{"league":>8}{"seconds":>9}{"requests":>10}'
+          f'{"429":>6}{"missing":>9}  final rate')
+    for name, make_scheduler in schedulers.items():
+        results = bench_leagues(folder, workers=workers,
+                                make_scheduler=make_scheduler,
+                                **server_options)
+        for league_id, result in results.items():
+            rates = ', '.join(f'{state["rate"]}/s x{state["concurrency"]}'
+                              for state in result["rates"].values())
+            print(f'{name:<10}{league_id:>8}{result["seconds"]:>9.2f}'
+                  f'{result["pages"]:>10}{result["throttled"]:>6}'
+                  f'{result["missing_games"]:>9}  {rates or "-"}')
+
+
+def synthetic_games(count: int, teams: int = 16, seed: int = 1) -> list:
+    """
+    count games (match_info without lineups) of leagues where each of
+    `teams` teams plays each other twice, a few forfeits and penalties
+    """
+    rand = random.Random(seed)
+    games = []
+    league = 0
+    while len(games) < count:
+        league += 1
+        ids = [league * 100 + num for num in range(teams)]
+        start = datetime.datetime(2000 + league % 20, 8, 1, 17)
+        rounds = []
+        for _ in range(teams - 1):  # circle method, each team once a round
+            rounds.append([(ids[num], ids[-1 - num])
+                           for num in range(teams // 2)])
+            ids = ids[:1] + ids[-1:] + ids[1:-1]
+        rounds += [[(away, home) for home, away in pairs]
+                   for pairs in rounds]
+        schedule = [(round_num, home, away)
+                    for round_num, pairs in enumerate(rounds, 1)
+                    for home, away in pairs]
+        for round_num, home, away in schedule[:count - len(games)]:
+            home_score, away_score = rand.randint(0, 5), rand.randint(0, 4)
+            result_type = 'regular'
+            if rand.random() < 0.02:
+                result_type, home_score, away_score = 'forfeit', 3, 0
+            elif home_score == away_score and rand.random() < 0.3:
+                result_type = 'penalties'
+            games.append({
+                "match_id": len(games), "competition_id": league,
+                "round": round_num,
+                "datetime": (start + datetime.timedelta(
+                    days=7 * round_num)).isoformat(),
+                "home_team": f'Team {home}', "away_team": f'Team {away}',
+                "home_team_id": str(home), "away_team_id": str(away),
+                "result_type": result_type, "home_score": home_score,
+                "away_score": away_score,
+            })
+    return games
+
+
+def dict_table(games: list, competition, round_num: int = None,
+               last: int = None) -> dict:
+    """
+    team_id -> (played, goals for, goals against, points) by loops over
+    the dicts, the way it was done before analytics.py. With last only last
+    games of each team, competition None means all games
+    """
+    team_games = {}
+    for game in sorted(games, key=lambda game: game["datetime"]):
+        if competition not in (None, game["competition_id"]) or (
+                round_num is not None and game["round"] > round_num):
+            continue
+        for side, other in (('home', 'away'), ('away', 'home')):
+            team_games.setdefault(game[side + '_team_id'], []).append(
+                (game[side + '_score'], game[other + '_score']))
+    table = {}
+    for team_id, results in team_games.items():
+        results = results[-last:] if last else results
+        table[team_id] = (
+            len(results), sum(gf for gf, _ in results),
+            sum(ga for _, ga in results),
+            sum(analytics.WIN if gf > ga else analytics.DRAW if gf == ga
+                else 0 for gf, ga in results))
+    return table
+
+
+def as_dict_table(rows: list) -> dict:
+    return {row["team_id"]: (row["played"], row["goals_for"],
+                             row["goals_against"], row["points"])
+            for row in rows}
+
+
+def print_analytics_times(count: int, queries: int = 100) -> bool:
+    """
+    compute tables after random rounds, form tables, head to head and form
+    table of all games (archive) of synthetic games with dict loops,
+    analytics.py without NumPy and with it (if installed), print the times
+    and check the tables are the same
+    """
+    games = synthetic_games(count)
+    rand = random.Random(2)
+    picks = [rand.choice(games) for _ in range(queries)]
+    ways = {"dict loops": None, "columns": False}
+    if analytics.numpy is not None:
+        ways["numpy"] = True
+    installed = analytics.numpy
+    all_same = True
+    print(f'{len(games)} games, {queries} queries of each kind')
+    print(f'{"way":<12}{"load":>8}{"tables":>9}{"form":>9}{"h2h":>9}'
+          f'{"archive":>9}')
+    try:
+        for way, use_numpy in ways.items():
+            times = []
+            if use_numpy is None:
+                times.append(0)
+                start = time.perf_counter()
+                tables = [dict_table(games, pick["competition_id"],
+                                     pick["round"]) for pick in picks]
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                forms = [dict_table(games, pick["competition_id"], last=5)
+                         for pick in picks]
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                [[game for game in games
+                  if {game["home_team_id"], game["away_team_id"]} ==
+                  {pick["home_team_id"], pick["away_team_id"]}]
+                 for pick in picks]
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                archive = dict_table(games, None, last=5)
+                times.append(time.perf_counter() - start)
+                expected = tables, forms, archive
+            else:
+                analytics.numpy = installed if use_numpy else None
+                start = time.perf_counter()
+                columns = analytics.Games(games)
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                tables = [as_dict_table(analytics.league_table(
+                    columns, pick["competition_id"], pick["round"]))
+                    for pick in picks]
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                forms = [as_dict_table(analytics.form_table(
+                    columns, 5, pick["competition_id"])) for pick in picks]
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                for pick in picks:
+                    analytics.head_to_head(columns, pick["home_team_id"],
+                                           pick["away_team_id"])
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                archive = as_dict_table(analytics.form_table(columns, 5))
+                times.append(time.perf_counter() - start)
+                same = (tables, forms, archive) == expected
+                all_same = all_same and same
+            print(f'{way:<12}' + ''.join(f'{seconds:>8.3f}s'
+                                         for seconds in times)
+                  + ('' if use_numpy is None else
+                     '  same' if same else '  DIFFERENT'))
+    finally:
+        analytics.numpy = installed
+    return all_same
+
+
+def player_name(player_id: int) -> str:
+    return ''.join('abcdefghij'[int(digit)]
+                   for digit in str(player_id)).capitalize()
+
+
+def synthetic_lineup(team: str, first_id: int) -> str:
+    """lineup of 11 players, every 4th substituted, ids from first_id + 1"""
+    items = []
+    for num in range(11):
+        player_id = first_id + num + 1
+        item = (f'<a href="/hrac/{player_id}/">Hrac '
+                f'{player_name(player_id)}</a>')
+        if num % 4 == 0:
+            item += (f' ({60 + num}. <a href="/hrac/{player_id + 1000}/">'
+                     f'Nahr {player_name(player_id)}</a>)')
+        items.append(item)
+    return f'<div><strong>{team}</strong> ' + ', '.join(items) + '</div>'
+
+
+def synthetic_site(folder: str, chrome: bool = True, seed: int = 1) -> None:
+    """
+    write league 438 with 42 games into folder, in the layout of
+    'scraper.py --record FOLDER', with pages.json. With chrome each page
+    has menu and footer, so it has about 90 kB like the pages of the
+    website, otherwise only a few kB
+    """
+    rand = random.Random(seed)
+    nav = '<nav>' + ''.join(
+        f'<ul class="menu"><li><a href="/soutez/{num}/">Soutěž {num}</a>'
+        f'<span>okres {num}</span></li></ul>' for num in range(600)) + \
+        '</nav>'
+    footer = '<footer>' + ''.join(
+        f'<div class="f"><p>Partner {num}</p><img src="/{num}.png"/></div>'
+        for num in range(300)) + '</footer><script>' + 'var x=1;' * 2000 + \
+        '</script>'
+    recorder = fixtures.Recorder(folder)
+
+    def write(path: str, kind: str, html: str) -> None:
+        if chrome:
+            html = html.replace('<body>', '<body>' + nav).replace(
+                '</body>', footer + '</body>')
+        recorder.save(path, kind, html.encode())
+
+    teams = [(100 + num, f'Team {chr(65 + num)}') for num in range(6)]
+    menu = (
+        '<html><head></head><body><header><div class="secondary-menu '
+        'secondary-menu-soutez">\n<a href="/soutez/tabulka/438/">Tabulka'
+        '</a><a href="/soutez/rozlosovani/438/">Rozlosování</a>\n'
+        '<a href="/soutez/439/">Jiná soutěž</a></div></header>'
+        '<div id="content" class="inner-container"><h1>x</h1></div>'
+        '</body></html>')
+    write('/soutez/438/', 'league', menu)
+    rows = ''.join(
+        f'<tr><td>{num + 1}.</td><td><a href="/klub/{team_id}/">{name}</a>'
+        f'</td><td>{30 - num}</td></tr>'
+        for num, (team_id, name) in enumerate(teams))
+    write('/soutez/tabulka/438/', 'table',
+          '<html><body><header><h2>head</h2></header><div id="content" '
+          'class="inner-container"><h1>Kraj | Okres | I. třída</h1>'
+          f'<h2>2021-2022</h2><table>{rows}</table></div></body></html>')
+    panels = ''
+    match_id, player_id = 1000, 5000
+    for round_num in range(1, 15):
+        games = ''
+        for num in range(3):
+            match_id += 1
+            home, away = rand.sample(teams, 2)
+            draw = rand.random()
+            if round_num >= 13:
+                score = '-:- (-:-)'
+            elif draw < 0.05:
+                score = None  # cancelled
+            elif draw < 0.1:
+                score = '3:0 kont.'
+            elif draw < 0.15:
+                score = '%'
+            elif draw < 0.2:
+                score = '2:2 p. (1:1)'
+            else:
+                score = (f'{rand.randint(0, 4)}:{rand.randint(0, 4)} '
+                         f'({rand.randint(0, 2)}:{rand.randint(0, 2)})')
+            result = (f'<a href="/zapas/{match_id}/">{score}</a>'
+                      f'<a href="#">{round_num + 10}.8. 17:00</a>'
+                      if score else '<a href="#">zrušeno</a>')
+            games += (
+                '<li><table><tr><td class="zapas-item-utkani text-left">'
+                f'<a href="/zapas/{match_id}/">{home[1]} - {away[1]}</a>'
+                f'</td><td class="zapas-item-vysledek">{result}</td></tr>'
+                '</table></li>')
+            lineups = synthetic_lineup(home[1], player_id) + \
+                synthetic_lineup(away[1], player_id + 11)
+            player_id += 22
+            goals = ('<div>12. <a href="/hrac/5001/">Hrac Bcca</a>, 50. '
+                     '<a href="/hrac/5002/">Hrac Bccc</a> (p.), 70. '
+                     '<a href="/hrac/5003/">Hrac Bccd</a> (vl.)</div>'
+                     if num != 1 else '')
+            if score and not score.startswith('-'):
+                write(f'/zapas/{match_id}/', 'match', (
+                    '<html><body><header><div class="secondary-menu '
+                    'secondary-menu-soutez"><a href="/soutez/438/">'
+                    'I. třída</a></div></header><div id="content" '
+                    'class="inner-container">\n'
+                    f'<h2><a href="/klub/{home[0]}/">{home[1]}</a></h2>'
+                    f'<h2><a href="/klub/{away[0]}/">{away[1]}</a></h2>\n'
+                    f'<div><h4>Sestavy</h4>{lineups}<div><strong>ŽK:'
+                    '</strong> 23. <a href="/hrac/5001/">Hrac Bcca</a>, 44. '
+                    '<a href="/hrac/5003/">Hrac Bccd</a> ČK: 80. '
+                    '<a href="/hrac/5004/">Hrac Bcce</a>.</div></div>\n'
+                    f'<div><h4>Branky</h4>{goals}</div></div></body>'
+                    '</html>'))
+        panels += (f'<div class="panel panel-default"><h3>{round_num}. '
+                   f'kolo, {round_num + 10}.8.2021 </h3><ul>{games}</ul>'
+                   '</div>')
+    write('/soutez/rozlosovani/438/', 'schedule',
+          '<html><body><div id="content" class="inner-container">'
+          f'{panels}</div></body></html>')
+    recorder.close()
+
+
+def peak_memory_mb() -> float:
+    """peak resident memory of this process (Linux reports it in kB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Benchmarks of the scraper on saved pages, without touching the website.""")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parse_parser = commands.add_parser("parse", help="""
+    Measure parse time per page kind - whole page with html.parser (old way) \
+    against only used parts of the page with selected parser (new way) \
+    and check both ways give the same output.""")
+    parse_parser.add_argument("kind", choices=list(PAGE_KINDS))
+    parse_parser.add_argument("files", nargs='+', help="saved html pages")
+    parse_parser.add_argument("--parser", default='html.parser')
+
+    tokens_parser = commands.add_parser("tokens", help="""
+    Compare extraction of lineups, cards and goals by the old regular \
+    expression functions in bench.py and by lexer on recorded match \
+    pages.""")
+    tokens_parser.add_argument("folder")
+    tokens_parser.add_argument("--parser", default='html.parser')
+
+    politeness_parser = commands.add_parser("politeness", help="""
+    Scrape leagues recorded by 'scraper.py --record FOLDER' from local \
+    stand-in server, which gets slower with more requests at once and \
+    answers 429 over its capacity, with fixed and with adaptive rate.""")
+    politeness_parser.add_argument("folder")
+    politeness_parser.add_argument("--capacity", type=float, default=5,
+                                   help="requests per second of the server")
+    politeness_parser.add_argument("--slowdown", type=float, default=0.05,
+                                   help="seconds added for each other "
+                                        "request running at once")
+    politeness_parser.add_argument("--latency", type=float, default=0.02)
+    politeness_parser.add_argument("--rate", type=float, default=20,
+                                   help="fixed rate and the highest "
+                                        "adaptive rate")
+    politeness_parser.add_argument("--min-rate", type=float, default=0.5)
+    politeness_parser.add_argument("--concurrency", type=int, default=8)
+    politeness_parser.add_argument("-w", "--workers", type=int, default=8)
+    politeness_parser.add_argument("--parser", default='html.parser')
+
+    league_parser = commands.add_parser("league", help="""
+    Scrape leagues recorded by 'scraper.py --record FOLDER' from local \
+    stand-in server, report time, pages/sec, parse time per page kind and \
+    peak memory, and check JSON files are the same as recorded ones.""")
+    league_parser.add_argument("folder")
+    league_parser.add_argument("--latency", type=float, default=0,
+                               help="seconds added to each request")
+    league_parser.add_argument("-w", "--workers", type=int, default=1)
+    league_parser.add_argument("-p", "--processes", type=int, default=1)
+    league_parser.add_argument("--parser", default='html.parser')
+    league_parser.add_argument("--level", choices=list(utils.LEVEL_KEYS),
+                               default='full')
+    site_parser = commands.add_parser("site", help="""
+    Write synthetic league 438 into folder in the layout of 'scraper.py \
+    --record FOLDER', for 'parse', 'tokens' or standin.py.""")
+    site_parser.add_argument("folder")
+    site_parser.add_argument("--plain", action='store_true',
+                             help="pages without menu and footer, only "
+                                  "a few kB")
+    analytics_parser = commands.add_parser("analytics", help="""
+    Compare tables, form tables and head to head of synthetic games \
+    computed by loops over dicts and by analytics.py with and without \
+    NumPy.""")
+    analytics_parser.add_argument("--games", type=int, default=100000)
+    analytics_parser.add_argument("--queries", type=int, default=100)
+    arguments = parser.parse_args()
+    utils.HTML_PARSER = getattr(arguments, 'parser', utils.HTML_PARSER)
+
+    if arguments.command == 'parse':
+        saved_pages = []
+        for path in arguments.files:
+            with open(path, 'rb') as file:
+                saved_pages.append(file.read())
+        print_parse_times({arguments.kind: saved_pages}, arguments.parser)
+    elif arguments.command == 'politeness':
+        print_politeness(arguments.folder, arguments.rate,
+                         arguments.concurrency, arguments.min_rate,
+                         arguments.workers, latency=arguments.latency,
+                         capacity=arguments.capacity,
+                         slowdown=arguments.slowdown)
+    elif arguments.command == 'site':
+        synthetic_site(arguments.folder, chrome=not arguments.plain)
+    elif arguments.command == 'analytics':
+        if not print_analytics_times(arguments.games, arguments.queries):
+            raise SystemExit(1)
+    elif arguments.command == 'tokens':
+        if not print_token_times(
+                fixtures.load_pages(arguments.folder).get('match', [])):
+            raise SystemExit(1)
+    else:
+        league_results = bench_leagues(arguments.folder, arguments.latency,
+                                       arguments.workers, arguments.level,
+                                       arguments.processes)
+        failed = False
+        for league_id, result in league_results.items():
+            same = result["same_basic"] and result["same_games"]
+            failed = failed or not same
+            print(f'League {league_id}: {result["seconds"]:.2f} s, '
+                  f'{result["pages"]} pages, '
+                  f'{result["pages_per_second"]:.1f} pages/s, '
+                  f'output {"same as golden" if same else "DIFFERENT"}')
+        print()
+        print_parse_times(fixtures.load_pages(arguments.folder),
+                          arguments.parser)
+        print(f'\nPeak memory: {peak_memory_mb():.1f} MB')
+        if failed:
+            raise SystemExit(1)
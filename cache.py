@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# how long is page of each kind used without asking the server
+TTLS = {
+    "league": DAY,  # league page with menu
+    "table": HOUR,  # "Tabulka"
+    "schedule": HOUR,  # "Rozlosování"
+    "match": 30 * DAY,  # only pages of already finished games are downloaded
+    "page": HOUR,  # anything else
+}
+
+
+class CachedResponse:
+    """the part of requests.Response() the scraper uses, for page from cache"""
+    status_code = 200
+
+    def __init__(self, url: str, content: bytes):
+        self.url = url
+        self.content = content
+
+
+class PageCache:
+    """
+    Downloaded pages saved on disk in folder, one file for each URL,
+    and index.json with info about each file.
+    Page younger than TTL of its kind is used without request. Older page is
+    revalidated by conditional GET with ETag / Last-Modified from the server.
+    When size of all pages is over max_size bytes, the least recently used
+    pages are deleted.
+    """
+
+    def __init__(self, folder: str = '.cache', max_size: int = 200 * 2 ** 20,
+                 ttls: dict = None):
+        self.folder = folder
+        self.max_size = max_size
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self.hits = self.misses = self.revalidated = self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        os.makedirs(folder, exist_ok=True)
+        self.index_path = os.path.join(folder, 'index.json')
+        self.index = OrderedDict()  # url -> info, least recently used first
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as file:
+                self.index.update(json.load(file))
+        self.size = sum(entry["size"] for entry in self.index.values())
+
+    def file_path(self, url: str) -> str:
+        name = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.folder, name[:2], name)
+
+    def lookup(self, url: str, kind: str):
+        """
+        return tuple (content, headers). If content is None, page has to be
+        downloaded with headers (conditional GET if the page is in cache)
+        """
+        with self._lock:
+            entry = self.index.get(url)
+            if entry is None or not os.path.exists(self.file_path(url)):
+                return None, {}
+            self.index.move_to_end(url)
+            age = time.time() - entry["stored"]
+            if age <= self.ttls.get(kind, self.ttls["page"]):
+                self.hits += 1
+                self.bytes_saved += entry["size"]
+                return self._read(url), {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+        if entry.get("last_modified"):
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return None, headers
+
+    def not_modified(self, url: str) -> bytes:
+        """
+        server answered 304, page in cache is fresh again.
+        Return None if the page was meanwhile deleted from cache.
+        """
+        with self._lock:
+            entry = self.index.get(url)
+            if entry is None or not os.path.exists(self.file_path(url)):
+                return None
+            entry["stored"] = time.time()
+            self.revalidated += 1
+            self.bytes_saved += entry["size"]
+            self._changed()
+            return self._read(url)
+
+    def store(self, url: str, kind: str, content: bytes, headers) -> None:
+        """save downloaded page and delete old pages if cache is too big"""
+        path = self.file_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            self.misses += 1
+            with open(path + '.tmp', 'wb') as file:
+                file.write(content)
+            os.replace(path + '.tmp', path)
+            old = self.index.pop(url, None)
+            if old:
+                self.size -= old["size"]
+            self.index[url] = {
+                "kind": kind,
+                "stored": time.time(),
+                "size": len(content),
+                "etag": headers.get('ETag'),
+                "last_modified": headers.get('Last-Modified'),
+            }
+            self.size += len(content)
+            while self.size > self.max_size and len(self.index) > 1:
+                old_url, old = self.index.popitem(last=False)
+                self.size -= old["size"]
+                try:
+                    os.remove(self.file_path(old_url))
+                except FileNotFoundError:
+                    pass
+            self._changed()
+
+    def _read(self, url: str) -> bytes:
+        with open(self.file_path(url), 'rb') as file:
+            return file.read()
+
+    def _changed(self) -> None:
+        self._unsaved += 1
+        if self._unsaved >= 20:
+            self._save()
+
+    def _save(self) -> None:
+        with open(self.index_path + '.tmp', 'w') as file:
+            json.dump(self.index, file)
+        os.replace(self.index_path + '.tmp', self.index_path)
+        self._unsaved = 0
+
+    def save(self) -> None:
+        """write index of the cache on disk"""
+        with self._lock:
+            self._save()
+
+    def summary(self) -> str:
+        return (f'Cache: {self.hits} hits, {self.revalidated} revalidated, '
+                f'{self.misses} misses, {self.bytes_saved / 2 ** 20:.1f} MB '
+                f'not downloaded')
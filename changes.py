@@ -0,0 +1,227 @@
+import os
+import json
+import datetime
+import argparse
+from journal import dump_games
+
+FOLDER = 'changes'  # in the folder of the league
+
+
+def iter_changes(old, new):
+    """
+    yield changes from old to new games {match_id: match_info} one by one,
+    in the order of new games, removed games at the end. Each change is
+    a dict:
+    {"match_id": 1001, "op": "new", "added": {all fields}},
+    {"match_id": 1001, "op": "update", "added": {...}, "changed": {...},
+    "removed": [field, ...]} (only the fields which are different,
+    empty parts are left out),
+    {"match_id": 1001, "op": "delete"}
+    """
+    for match_id, match_info in new.items():
+        match_info = json.loads(json.dumps(match_info))  # as read from file
+        before = old.get(match_id)
+        if before is None:
+            yield {"match_id": match_id, "op": "new", "added": match_info}
+        elif before != match_info:
+            change = {
+                "match_id": match_id, "op": "update",
+                "added": {field: value for field, value in match_info.items()
+                          if field not in before},
+                "changed": {field: value
+                            for field, value in match_info.items()
+                            if field in before and before[field] != value},
+                "removed": [field for field in before
+                            if field not in match_info],
+            }
+            yield {key: value for key, value in change.items()
+                   if value}  # without empty parts
+    for match_id in old:
+        if match_id not in new:
+            yield {"match_id": match_id, "op": "delete"}
+
+
+def apply_changes(games: dict, changes: list) -> dict:
+    """apply changes from iter_changes() to games in place and return them"""
+    for change in changes:
+        match_id = change["match_id"]
+        if change["op"] == "new":
+            games[match_id] = dict(change["added"])
+        elif change["op"] == "delete":
+            games.pop(match_id, None)
+        else:
+            match_info = games[match_id]
+            match_info.update(change.get("added", {}))
+            match_info.update(change.get("changed", {}))
+            for field in change.get("removed", []):
+                match_info.pop(field, None)
+    return games
+
+
+def with_int_ids(games: dict) -> dict:
+    """JSON has match ids as strings"""
+    return {int(match_id): game for match_id, game in games.items()}
+
+
+class ChangeFeed:
+    """
+    Change log of the games of one league. Each run which changed games.json
+    writes <league>/changes/<run>.json with the changes against the previous
+    games.json, runs are numbered 1, 2, 3... Snapshot of any run is made
+    from base (<league>/changes/base-<run>.json, or no games) and the changes
+    of the following runs.
+    """
+
+    def __init__(self, id_league: str):
+        self.folder = os.path.join(id_league, FOLDER)
+
+    def path(self, run: int, base: bool = False) -> str:
+        name = f'base-{run:06}.json' if base else f'{run:06}.json'
+        return os.path.join(self.folder, name)
+
+    def numbers(self, base: bool = False) -> list:
+        """numbers of runs (or bases) in the log, in order"""
+        if not os.path.exists(self.folder):
+            return []
+        prefix = 'base-' if base else ''
+        names = [name[:-5] for name in os.listdir(self.folder)
+                 if name.endswith('.json')]
+        return sorted(int(name[len(prefix):]) for name in names
+                      if name.startswith(prefix)
+                      and name[len(prefix):].isdigit())
+
+    def first_run(self) -> int:
+        """changes of runs after this one are in the log"""
+        return min(self.numbers(base=True), default=0)
+
+    def last_run(self) -> int:
+        """number of the last run, 0 if there is none"""
+        return max(self.numbers() + self.numbers(base=True), default=0)
+
+    def _write_base(self, run: int, games) -> None:
+        """games are written one by one, they can be e.g. GamesFile"""
+        path = self.path(run, base=True)
+        os.makedirs(self.folder, exist_ok=True)
+        with open(path + '.tmp', 'w') as file:
+            file.write(f'{{"run": {run}, "games": ')
+            dump_games(games, file)
+            file.write('}')
+        os.replace(path + '.tmp', path)
+
+    def record(self, old, new) -> int:
+        """
+        write changes from old to new games (both can be any mapping,
+        e.g. GamesFile and JournalGames, which don't keep games in memory)
+        as the next run and return its number, or None if nothing changed.
+        Changes are written one by one, they are never all in memory.
+        Games saved before the first run are kept as the base of the log,
+        games of a new league are the base of its first run
+        """
+        run = self.last_run()
+        if run == 0 and not old:  # new league, all games would be new
+            if not new:
+                return None
+            self._write_base(1, new)
+            return 1
+        path = self.path(run + 1)
+        os.makedirs(self.folder, exist_ok=True)
+        changed = False
+        with open(path + '.tmp', 'w') as file:
+            time = datetime.datetime.now().isoformat(timespec='seconds')
+            file.write(f'{{"run": {run + 1}, "time": "{time}", '
+                       f'"changes": [')
+            for change in iter_changes(old, new):
+                if changed:
+                    file.write(', ')
+                json.dump(change, file, ensure_ascii=False)
+                changed = True
+            file.write(']}')
+        if not changed:
+            os.remove(path + '.tmp')
+            return None
+        if run == 0:
+            self._write_base(0, old)
+        os.replace(path + '.tmp', path)
+        return run + 1
+
+    def since(self, run: int = None) -> list:
+        """
+        changes of runs after run (by default all in the log), as list
+        of dicts {"run": number, "time": ..., "changes": [...]}.
+        ValueError if some of them were removed by rebase()
+        """
+        if run is None:
+            run = self.first_run()
+        if run < self.first_run():
+            raise ValueError(f'changes of runs up to {self.first_run()} were '
+                             f'removed, start from snapshot of the run')
+        runs = []
+        for number in self.numbers():
+            if number > run:
+                with open(self.path(number)) as file:
+                    runs.append(json.load(file))
+        return runs
+
+    def snapshot(self, run: int = None) -> dict:
+        """games as they were after the run (by default after the last one)"""
+        if run is not None and run < self.first_run():
+            raise ValueError(f'run {run} was removed from the log')
+        bases = [number for number in self.numbers(base=True)
+                 if run is None or number <= run]
+        games = {}
+        start = 0
+        if bases:
+            start = bases[-1]
+            with open(self.path(start, base=True)) as file:
+                games = with_int_ids(json.load(file)["games"])
+        for logged in self.since(start):
+            if run is not None and logged["run"] > run:
+                break
+            apply_changes(games, logged["changes"])
+        return games
+
+    def rebase(self, run: int) -> None:
+        """
+        save snapshot of the run as base and delete older runs and bases,
+        changes since the run stay
+        """
+        self._write_base(run, self.snapshot(run))
+        for number in self.numbers():
+            if number <= run:
+                os.remove(self.path(number))
+        for number in self.numbers(base=True):
+            if number < run:
+                os.remove(self.path(number, base=True))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Show changes of games of the league made by scraper.py, or games
+    as they were after any run.""")
+    parser.add_argument("league", help="folder of the league")
+    parser.add_argument("--since", type=int, metavar="RUN",
+                        help="print changes of runs after RUN as JSON lines")
+    parser.add_argument("--snapshot", type=int, metavar="RUN",
+                        help="print games as they were after RUN")
+    parser.add_argument("--rebase", type=int, metavar="RUN",
+                        help="keep only changes after RUN, games of RUN "
+                             "are saved as the base")
+    arguments = parser.parse_args()
+
+    feed = ChangeFeed(arguments.league)
+    if arguments.since is not None:
+        for logged in feed.since(arguments.since):
+            print(json.dumps(logged, ensure_ascii=False))
+    elif arguments.snapshot is not None:
+        print(json.dumps(feed.snapshot(arguments.snapshot), indent=4,
+                         ensure_ascii=False))
+    elif arguments.rebase is not None:
+        feed.rebase(arguments.rebase)
+    else:
+        print(f'Last run: {feed.last_run()}')
+        for logged in feed.since():
+            counts = {}
+            for change in logged["changes"]:
+                counts[change["op"]] = counts.get(change["op"], 0) + 1
+            print(f'Run {logged["run"]} ({logged["time"]}): ' + ', '.join(
+                f'{num} {op}' for op, num in counts.items()))
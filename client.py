@@ -0,0 +1,189 @@
+import time
+import threading
+import email.utils
+import requests
+from requests.adapters import HTTPAdapter
+from cache import PageCache, CachedResponse
+from scheduler import HostScheduler, AdaptiveScheduler
+from metrics import METRICS
+
+try:  # urllib3 can decode brotli only if this package is installed
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def retry_after(r) -> float:
+    """seconds from Retry-After header (seconds or http date), or None"""
+    value = r.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class FetchError(Exception):
+    """page could not be downloaded, not even after all retries"""
+
+    def __init__(self, link: str, message: str):
+        super().__init__(f'{link}: {message}')
+        self.link = link
+
+
+class ConnectionFailed(FetchError):
+    """network problem - refused or reset connection, timeout, DNS error"""
+
+
+class BadStatus(FetchError):
+    """server answered with http status code 4xx or 5xx"""
+
+    def __init__(self, link: str, status_code: int):
+        super().__init__(link, f'http status {status_code}')
+        self.status_code = status_code
+
+
+class Client:
+    """
+    One requests.Session() shared by all requests of the run.
+    Connections to the server are kept alive and reused, responses can be
+    compressed. Every request has a timeout and network errors or 5xx
+    responses are retried with exponential backoff (backoff, 2*backoff, ...).
+    If the page can't be downloaded, FetchError is raised.
+    With PageCache, pages are taken from the cache if possible.
+    With fixtures.Recorder, every page is saved for later replay.
+    With archive.PageArchive, every version of every page is kept.
+    With HostScheduler shared by more clients, all their requests together
+    keep its rate and concurrency limits. By default each client has its own
+    AdaptiveScheduler, which slows down when the website does.
+    """
+
+    def __init__(self, timeout: float = 10, retries: int = 3,
+                 backoff: float = 1, pool_size: int = 10,
+                 cache: PageCache = None, recorder=None,
+                 scheduler: HostScheduler = None, archive=None):
+        self.cache = cache
+        self.recorder = recorder
+        self.archive = archive
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.requests = self.retried = self.errors = 0  # counters for run
+        self._lock = threading.Lock()
+
+    def get(self, link: str, kind: str = 'page', fresh: bool = False):
+        """
+        return requests.Response() object with status code below 400
+        or CachedResponse. `kind` of the page decides how long it is cached,
+        fresh page is always downloaded (and saved in the cache)
+        """
+        start = time.perf_counter()
+        try:
+            r = self.cached_get(link, kind, fresh)
+        except FetchError:
+            with self._lock:
+                self.errors += 1
+            METRICS.count('errors')
+            raise
+        METRICS.record('fetch.' + kind, time.perf_counter() - start)
+        if self.recorder:
+            self.recorder.save(link, kind, r.content)
+        if self.archive:
+            self.archive.save(link, kind, r.content)
+        return r
+
+    def cached_get(self, link: str, kind: str, fresh: bool = False):
+        """get page from the cache, or download it"""
+        if not self.cache:
+            return self.download(link, kind=kind)
+        if fresh:
+            r = self.download(link, kind=kind)
+            self.cache.store(link, kind, r.content, r.headers)
+            return r
+
+        content, headers = self.cache.lookup(link, kind)
+        if content is not None:
+            METRICS.count('cache_hits')
+            return CachedResponse(link, content)
+        r = self.download(link, headers, kind)
+        if r.status_code == 304:
+            content = self.cache.not_modified(link)
+            if content is not None:
+                METRICS.count('cache_revalidated')
+                return CachedResponse(link, content)
+            r = self.download(link, kind=kind)
+        self.cache.store(link, kind, r.content, r.headers)
+        return r
+
+    def download(self, link: str, headers: dict = None,
+                 kind: str = 'page') -> requests.Response:
+        """
+        download page from the server, with retries. Time of each attempt is
+        measured as wait (connection and server until headers arrive)
+        and transfer (body of the response)
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+                with self._lock:
+                    self.retried += 1
+                METRICS.count('retries')
+            with self._lock:
+                self.requests += 1
+            METRICS.count('requests')
+            try:
+                queued = time.perf_counter()
+                with self.scheduler.slot(link):
+                    start = time.perf_counter()
+                    METRICS.record('throttle.' + kind, start - queued)
+                    r = self.session.get(link, headers=headers,
+                                         timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                self.scheduler.feedback(link, time.perf_counter() - start)
+                error = ConnectionFailed(link, str(e))
+                continue
+            elapsed = time.perf_counter() - start
+            wait = min(r.elapsed.total_seconds(), elapsed)
+            self.scheduler.feedback(link, wait, r.status_code, retry_after(r))
+            METRICS.record('wait.' + kind, wait)
+            METRICS.record('transfer.' + kind, elapsed - wait)
+            METRICS.count('bytes', len(r.content))
+            if r.status_code < 400:
+                return r
+            error = BadStatus(link, r.status_code)
+            if r.status_code not in RETRY_STATUSES:
+                break
+            if r.status_code == 429:
+                METRICS.count('throttled')
+        raise error
+
+    def close(self) -> None:
+        self.session.close()
+        if self.cache:
+            self.cache.save()
+        if self.recorder:
+            self.recorder.close()
+
+
+_default_client = None
+
+
+def default_client() -> Client:
+    """return Client shared by all functions which didn't get their own"""
+    global _default_client
+    if _default_client is None:
+        _default_client = Client()
+    return _default_client
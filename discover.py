@@ -0,0 +1,163 @@
+import re
+import sqlite3
+from urllib.parse import urljoin, urlparse
+from bs4 import SoupStrainer
+import utils
+from client import Client, FetchError, default_client
+from metrics import METRICS
+
+# pages the crawler follows: (path, kind of page for the cache, priority)
+# lower priority number is fetched first, so leagues are found early
+RULES = (
+    (re.compile(r'/soutez/(\d+)/'), 'league', 0),
+    (re.compile(r'/soutez/tabulka/\d+/'), 'table', 1),
+    (re.compile(r'/soutez/rozlosovani/\d+/'), 'schedule', 2),
+    (re.compile(r'/klub/\d+/'), 'page', 3),
+    (re.compile(r'/zapas/\d+/'), 'match', 4),
+)
+
+LINKS = SoupStrainer('a')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    kind TEXT,
+    priority INTEGER,
+    depth INTEGER,
+    state TEXT DEFAULT 'queued'
+);
+CREATE INDEX IF NOT EXISTS frontier_next ON frontier (state, priority, depth);
+CREATE TABLE IF NOT EXISTS leagues (
+    league_id INTEGER PRIMARY KEY,
+    url TEXT,
+    depth INTEGER
+);
+"""
+
+
+def classify(url: str, site: str):
+    """
+    return (normalized url, kind, priority) if the crawler follows the url,
+    else None. Only pages of the site are followed, without query.
+    """
+    parsed = urlparse(url)
+    if parsed.netloc != urlparse(site).netloc:
+        return None
+    path = parsed.path if parsed.path.endswith('/') else parsed.path + '/'
+    for pattern, kind, priority in RULES:
+        if pattern.fullmatch(path):
+            return site + path, kind, priority
+    return None
+
+
+class Frontier:
+    """
+    URLs waiting for the crawler, saved in SQLite database, so the crawl
+    can be stopped and continued. Each url is there only once and is given
+    out only once - as 'queued', then 'fetching', then 'done' or 'failed'.
+    Page which was being fetched when the crawl stopped is queued again.
+    """
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        with self.db:
+            self.db.execute("UPDATE frontier SET state = 'queued' "
+                            "WHERE state = 'fetching'")
+
+    def add(self, url: str, kind: str, priority: int, depth: int) -> bool:
+        """queue url, False if it was seen already"""
+        with self.db:
+            cursor = self.db.execute(
+                'INSERT OR IGNORE INTO frontier (url, kind, priority, depth) '
+                'VALUES (?, ?, ?, ?)', (url, kind, priority, depth))
+        return cursor.rowcount == 1
+
+    def pop(self):
+        """return (url, kind, depth) of the next page and mark it, or None"""
+        with self.db:
+            row = self.db.execute(
+                "SELECT url, kind, depth FROM frontier WHERE state = 'queued' "
+                "ORDER BY priority, depth, rowid LIMIT 1").fetchone()
+            if row:
+                self.db.execute("UPDATE frontier SET state = 'fetching' "
+                                "WHERE url = ?", (row[0],))
+        return row
+
+    def finish(self, url: str, state: str = 'done') -> None:
+        with self.db:
+            self.db.execute('UPDATE frontier SET state = ? WHERE url = ?',
+                            (state, url))
+
+    def add_league(self, league_id: int, url: str, depth: int) -> None:
+        with self.db:
+            self.db.execute('INSERT OR IGNORE INTO leagues VALUES (?, ?, ?)',
+                            (league_id, url, depth))
+
+    def leagues(self) -> list:
+        """ids of found leagues as strings, in order they were found"""
+        return [str(row[0]) for row in self.db.execute(
+            'SELECT league_id FROM leagues ORDER BY rowid')]
+
+    def counts(self) -> dict:
+        """number of urls in each state"""
+        return dict(self.db.execute(
+            'SELECT state, COUNT(*) FROM frontier GROUP BY state'))
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def is_league_page(content: bytes) -> bool:
+    """league page has menu with table and schedule of the league"""
+    soup = utils.make_soup(content, utils.LEAGUE_MENU)
+    return bool(soup.header and soup.header.find('div', {
+        'class': 'secondary-menu secondary-menu-soutez'}))
+
+
+def crawl(frontier: Frontier, seeds: list, site: str, client: Client = None,
+          max_depth: int = 3, max_pages: int = None,
+          progress=print) -> list:
+    """
+    Find leagues of the site, starting from seeds (urls). Pages are fetched
+    from the frontier in order of priority (leagues first), links of pages
+    deeper than max_depth are not followed. The crawl stops after max_pages
+    pages fetched in this run, the next run continues where it stopped.
+    Return ids of all leagues found so far.
+    """
+    client = client or default_client()
+    for url in seeds:
+        followed = classify(url, site)
+        if followed:
+            frontier.add(*followed, 0)
+        else:  # e.g. main page of the site
+            frontier.add(url, 'page', 0, 0)
+    fetched = 0
+    while max_pages is None or fetched < max_pages:
+        item = frontier.pop()
+        if item is None:
+            break
+        url, kind, depth = item
+        fetched += 1
+        try:
+            r = client.get(url, kind)
+        except FetchError as e:
+            progress(f'Page {url} couldn\'t be downloaded ({e})')
+            frontier.finish(url, 'failed')
+            continue
+
+        if kind == 'league' and is_league_page(r.content):
+            league_id = int(RULES[0][0].search(urlparse(url).path).group(1))
+            frontier.add_league(league_id, url, depth)
+            METRICS.count('leagues_found')
+            progress(f'Found league {league_id} ({url})')
+        if depth < max_depth:
+            new = 0
+            soup = utils.make_soup(r.content, LINKS)
+            for link in soup.find_all('a', href=True):
+                followed = classify(urljoin(url, link['href']), site)
+                if followed and frontier.add(*followed, depth + 1):
+                    new += 1
+            METRICS.count('links_queued', new)
+        frontier.finish(url)
+    return frontier.leagues()
@@ -0,0 +1,123 @@
+import os
+import time
+import socket
+import utils
+import api
+import scraper
+from client import Client, FetchError
+from workqueue import WorkQueue, WorkItem
+from metrics import METRICS
+
+
+def process(item: WorkItem, client: Client, site: str = api.MAIN_LINK):
+    """
+    do the work of one item and return its result:
+    'league' - basic info of the league and its schedule,
+    'match' - match info from the match page
+    """
+    if item.kind == 'league':
+        links = api.league_links(item.payload["league_id"], client, site)
+        basic_info = utils.scrap_basic_info_league(links["table"], client)
+        r = client.get(links["schedule"], 'schedule')
+        return {"basic_info": basic_info,
+                "schedule": utils.read_schedule(r.content, links["schedule"])}
+    game = item.payload["game"]
+    r = client.get(game["link"], 'match')
+    with METRICS.timer('parse.match'):
+        soup = utils.make_match_soup(r.content, game)
+    with METRICS.timer('extract.match'):
+        return utils.scrap_match_detail(soup, game, item.payload["level"])
+
+
+def work(queue: WorkQueue, client: Client, site: str = api.MAIN_LINK,
+         name: str = None, idle: float = 2) -> int:
+    """
+    Worker - lease items from the queue, process them and report results,
+    until the coordinator finished the queue and it is empty.
+    Return number of processed items.
+    """
+    name = name or f'{socket.gethostname()}-{os.getpid()}'
+    done = 0
+    while True:
+        item = queue.lease_item(name)
+        if item is None:
+            if queue.finished() and not queue.unfinished():
+                break
+            time.sleep(idle)
+            continue
+        try:
+            result = process(item, client, site)
+        except (Exception, SystemExit) as e:  # also page which can't be
+            # parsed, it mustn't stop the worker; check_response quits
+            error = str(e) if isinstance(e, FetchError) else \
+                f'{type(e).__name__}: {e}'
+            print(f'{item.key} failed ({error}), attempt {item.attempts}')
+            queue.fail(item, error)
+            METRICS.count('failed')
+            continue
+        queue.complete(item, result)
+        done += 1
+        METRICS.count('items')
+        if done % 100 == 0:
+            print(f'Worker {name}: {done} items done')
+    print(f'Worker {name}: {done} items done')
+    return done
+
+
+def match_items(schedule: list, level: str) -> list:
+    """work items for match pages of games with result"""
+    return [(f'match:{game["match_id"]}', 'match',
+             {"game": game, "level": level})
+            for game in schedule if "skip" not in game]
+
+
+def coordinate(queue: WorkQueue, ids: list, level: str = 'full',
+               store=None, idle: float = 2) -> list:
+    """
+    Coordinator - put leagues into the queue, put match pages of each
+    league into the queue, when a worker reports its schedule, and when
+    all items are done or failed, make JSON files (and save leagues into
+    store) from the results. Return summaries like scraper.run_league().
+    The coordinator can be stopped and run again, done items are kept.
+    """
+    start = time.perf_counter()
+    queue.finish(False)
+    queue.put_many([(f'league:{id_league}', 'league',
+                     {"league_id": id_league}) for id_league in ids])
+    expanded = set()
+    while True:
+        for key, result in queue.results('league').items():
+            if key not in expanded:
+                if level != 'results':
+                    queue.put_many(match_items(result["schedule"], level))
+                expanded.add(key)
+        if not queue.unfinished():
+            break
+        time.sleep(idle)
+    queue.finish()
+
+    summaries = []
+    for id_league in ids:
+        summary = {"league_id": id_league, "games": 0, "failed": True,
+                   "seconds": time.perf_counter() - start, "requests": 0,
+                   "retries": 0, "errors": 0}
+        league = queue.result(f'league:{id_league}')
+        if league:
+            games = {}
+            for game in league["schedule"]:
+                if "skip" in game:
+                    continue
+                if level == 'results':
+                    games[game["match_id"]] = utils.results_info(game)
+                    continue
+                match_info = queue.result(f'match:{game["match_id"]}')
+                if match_info:
+                    games[game["match_id"]] = match_info
+            scraper.create_jsons(id_league, league["basic_info"], games)
+            if store:
+                store.save(league["basic_info"], games)
+            summary.update(games=len(games), failed=False)
+        summaries.append(summary)
+    for key, error in queue.failed().items():
+        print(f'{key} FAILED: {error}')
+    return summaries
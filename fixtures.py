@@ -0,0 +1,73 @@
+import os
+import json
+import shutil
+import threading
+from urllib.parse import urlparse
+
+
+def page_path(folder: str, url: str) -> str:
+    """file of the page in folder, /soutez/438/ is folder/soutez/438/index.html"""
+    path = urlparse(url).path.strip('/')
+    return os.path.join(folder, path, 'index.html')
+
+
+class Recorder:
+    """
+    Saves every page the client gets into folder, in the layout standin.py
+    serves, and pages.json with the kind of each page.
+    With save_golden() JSON files of the league are saved to folder/golden/,
+    so replayed run can be checked against them.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.index_path = os.path.join(folder, 'pages.json')
+        self.pages = {}  # url path -> kind
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as file:
+                self.pages = json.load(file)
+        self._lock = threading.Lock()
+
+    def save(self, url: str, kind: str, content: bytes) -> None:
+        path = page_path(self.folder, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+        with self._lock:
+            self.pages['/' + urlparse(url).path.strip('/') + '/'] = kind
+
+    def save_golden(self, id_league: str) -> None:
+        """copy JSON files of the league made by scraper.create_jsons()"""
+        golden = os.path.join(self.folder, 'golden', id_league)
+        os.makedirs(golden, exist_ok=True)
+        for name in ('basic.json', 'games.json'):
+            shutil.copy(os.path.join(id_league, name), golden)
+
+    def close(self) -> None:
+        with self._lock:
+            with open(self.index_path, 'w') as file:
+                json.dump(self.pages, file, indent=4, ensure_ascii=False)
+
+
+def load_pages(folder: str) -> dict:
+    """return recorded pages as dict {kind: [content, ...]}"""
+    with open(os.path.join(folder, 'pages.json')) as file:
+        pages = json.load(file)
+    contents = {}
+    for path, kind in pages.items():
+        with open(page_path(folder, path), 'rb') as file:
+            contents.setdefault(kind, []).append(file.read())
+    return contents
+
+
+def load_golden(folder: str) -> dict:
+    """return {league_id: (basic_info, games)} saved by Recorder.save_golden()"""
+    golden = os.path.join(folder, 'golden')
+    leagues = {}
+    for id_league in sorted(os.listdir(golden)):
+        jsons = []
+        for name in ('basic.json', 'games.json'):
+            with open(os.path.join(golden, id_league, name)) as file:
+                jsons.append(json.load(file))
+        leagues[id_league] = tuple(jsons)
+    return leagues
@@ -0,0 +1,145 @@
+import os
+import json
+from collections.abc import Mapping, MutableMapping
+
+
+class GameJournal(Mapping):
+    """
+    Append-only file with one scraped game per line (JSON Lines).
+    Each game is written as soon as it is scraped, so after crash or Ctrl-C
+    the next run can continue where this one stopped.
+    Only offsets of the lines are kept in memory, games are read from file.
+    Works as read-only dict {match_id: match_info}.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.offsets = {}  # match_id -> offset of its last line in file
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if resume and os.path.exists(path):
+            self.file = open(path, 'r+b')
+            self._load()
+        else:
+            self.file = open(path, 'w+b')
+
+    def _load(self) -> None:
+        """read offsets of all complete lines, cut off the unfinished one"""
+        offset = 0
+        for line in self.file:
+            if not line.endswith(b'\n'):  # program stopped while writing
+                break
+            match_id = json.loads(line)["match_id"]
+            self.offsets[match_id] = offset
+            offset += len(line)
+        self.file.seek(offset)
+        self.file.truncate()
+
+    def append(self, match_info: dict) -> None:
+        self.file.seek(0, os.SEEK_END)
+        offset = self.file.tell()
+        line = json.dumps(match_info, ensure_ascii=False) + '\n'
+        self.file.write(line.encode())
+        self.file.flush()
+        self.offsets[match_info["match_id"]] = offset
+
+    def __getitem__(self, match_id) -> dict:
+        self.file.seek(self.offsets[match_id])
+        return json.loads(self.file.readline())
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def close(self, remove: bool = False) -> None:
+        """close the file, remove it when all games were saved elsewhere"""
+        self.file.close()
+        if remove:
+            os.remove(self.path)
+
+
+class GamesFile(Mapping):
+    """
+    games.json written by dump_games() as read-only dict
+    {match_id: match_info}. Like in GameJournal, only offsets of the games
+    are kept in memory and each game is read from file when it is needed.
+    """
+
+    def __init__(self, path: str):
+        self.offsets = {}  # match_id -> offset of its first line
+        self.file = open(path, 'rb')
+        offset = 0
+        for line in self.file:
+            if line.startswith(b'    "'):  # game on top level, "1001": {
+                self.offsets[int(line[5:line.index(b'"', 5)])] = offset
+            offset += len(line)
+
+    def __getitem__(self, match_id) -> dict:
+        self.file.seek(self.offsets[match_id])
+        lines = []
+        for line in self.file:
+            lines.append(line)
+            if line.rstrip(b',\r\n') == b'    }':  # end of the game
+                break
+        item = b''.join(lines).decode().rstrip().rstrip(',')
+        return next(iter(json.loads('{' + item + '}').values()))
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class JournalGames(MutableMapping):
+    """
+    games dict of one run, which keeps only match ids in memory
+    and writes games into GameJournal
+    """
+
+    def __init__(self, journal: GameJournal):
+        self.journal = journal
+        self.match_ids = {}  # used as ordered set
+
+    def __setitem__(self, match_id, match_info: dict) -> None:
+        if self.journal.get(match_id) != match_info:
+            self.journal.append(match_info)
+        self.match_ids[match_id] = None
+
+    def __getitem__(self, match_id) -> dict:
+        if match_id not in self.match_ids:
+            raise KeyError(match_id)
+        return self.journal[match_id]
+
+    def __delitem__(self, match_id) -> None:
+        del self.match_ids[match_id]
+
+    def __iter__(self):
+        return iter(self.match_ids)
+
+    def __len__(self) -> int:
+        return len(self.match_ids)
+
+
+def dump_games(games: Mapping, file) -> None:
+    """
+    write games into file the same way as json.dump(games, file, indent=4,
+    ensure_ascii=False), but one game after another, so they don't have to
+    be in memory all at once
+    """
+    if not games:
+        file.write('{}')
+        return
+    file.write('{\n')
+    for num, (match_id, match_info) in enumerate(games.items()):
+        if num:
+            file.write(',\n')
+        item = json.dumps({match_id: match_info}, indent=4,
+                          ensure_ascii=False)
+        file.write(item[2:-2])  # without '{\n' and '\n}'
+    file.write('\n}')
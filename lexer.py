@@ -0,0 +1,184 @@
+import re
+from bs4.element import CData, NavigableString, Tag
+
+SPACES = re.compile(r"\s+")
+MINUTE = re.compile(r'(\d+)\.')
+SPACE_DOT = re.compile(r" \.")
+
+# '[-]' is noise left in text of items, group 1 is separator of items,
+# group 2 is section marker
+LINEUP_TOKENS = re.compile(r'\[-\]|(,|-(?=\s))')
+GOAL_TOKENS = re.compile(r'\[-\]|([-,])')
+CARD_TOKENS = re.compile(r'\[-\]|([-,])|(ŽK:|ČK:)')
+
+# end of these tags always ends the item, even without separator
+BLOCK_TAGS = {'div', 'p', 'li', 'tr'}
+
+
+class Item:
+    """text of one player / goal / card and ids of players linked in it"""
+    __slots__ = ('text', 'ids', 'section')
+
+    def __init__(self, text: str, ids: list, section: str = None):
+        self.text = text
+        self.ids = ids  # list of tuples (offset in text, player id)
+        self.section = section
+
+
+def tokenize(tag, pattern, skip=()) -> list:
+    """
+    Walk all text and <a> tags of tag in one pass, in document order,
+    remember where in the text each <a> tag starts, then split the text
+    into items by separators of pattern (start of block tag also ends item)
+    and attach the ids to the items. Text directly in tags named in skip
+    is left out. Return list of Items, also the empty ones.
+    """
+    parts = []
+    links = []  # tuples (offset in text, player id)
+    breaks = []  # offsets where block tags start
+    size = 0
+    for node in tag.descendants:
+        kind = type(node)
+        if kind is NavigableString or kind is CData:
+            if node.parent.name not in skip:
+                parts.append(node)
+                size += len(node)
+        elif kind is Tag:
+            if node.name == 'a' and 'href' in node.attrs:
+                links.append((size, node.attrs['href'].split('/')[-2]))
+            elif node.name in BLOCK_TAGS:
+                breaks.append(size)
+    text = ''.join(parts)
+
+    # spans of items: (start, end, section)
+    spans = []
+    start = 0
+    section = None
+    for match in pattern.finditer(text):
+        if match.group(1) or match.lastindex == 2:
+            spans.append((start, match.start(), section))
+            if match.lastindex == 2:  # section marker, e.g. 'ŽK:'
+                section = match.group(2)
+            start = match.end()
+    spans.append((start, len(text), section))
+    for offset in breaks:
+        for num, (start, end, section) in enumerate(spans):
+            if start < offset < end:
+                spans[num:num + 1] = [(start, offset, section),
+                                      (offset, end, section)]
+                break
+
+    items = []
+    link = 0
+    for start, end, section in spans:
+        ids = []
+        while link < len(links) and links[link][0] < end:
+            if links[link][0] >= start:
+                ids.append((links[link][0] - start, links[link][1]))
+            link += 1
+        items.append(Item(text[start:end], ids, section))
+    return items
+
+
+def clean(text: str) -> str:
+    """remove '[-]', tabs and newlines from text and strip it"""
+    return SPACES.sub(" ", text.replace('[-]', '')).strip()
+
+
+def minute_and_name(text: str) -> tuple:
+    """'23. Novák' -> ('23', 'Novák'), minute '1' if it is missing"""
+    minute = MINUTE.search(text)
+    if not minute:  # on some games this info is missing
+        return '1', text.strip()
+    return minute.group(1), text[minute.end():].strip()
+
+
+def lineup(team: str, tag, warning=print) -> list:
+    """
+    same as bench.get_players(), players without link get player_id None
+    instead of shifting ids of all following players.
+    Missing or short lineup is passed to warning().
+    """
+    if not tag:
+        warning(f'Missing line up for {team} in the game bellow.')
+        return []
+
+    items = [(item, clean(item.text)) for item in
+             tokenize(tag, LINEUP_TOKENS, skip=('strong',))]
+    items = [(item, name) for item, name in items if name]
+    if len(items) < 7:
+        warning(f'Less than 7 players on {team} side.  '
+                'Game supposed to be canceled')
+        return []
+
+    players = []  # list of dict
+    for item, name in items:
+        text = item.text
+        bracket = text.find('(')
+        if bracket == -1:  # player got not subs, he played all game
+            player_id = item.ids[0][1] if item.ids else None
+            players.append({'player_id': player_id, 'name': name,
+                            'role': 'start', 'minutes': 90})
+            continue
+
+        # player got subs, he did not play 90 minutes
+        base_ids = [pid for offset, pid in item.ids if offset < bracket]
+        subs_ids = [pid for offset, pid in item.ids if offset > bracket]
+        subs_text = clean(text[bracket + 1:])
+        minute = MINUTE.search(subs_text)
+        if minute:
+            played = int(minute.group(1))
+            subs_name = subs_text[minute.end():]
+        else:  # minute of substitution is missing
+            played = None
+            subs_name = subs_text
+        players.append({'player_id': base_ids[0] if base_ids else None,
+                        'name': clean(text[:bracket]), 'role': 'start',
+                        'minutes': played})
+        players.append({'player_id': subs_ids[0] if subs_ids else None,
+                        'name': subs_name.replace(')', '').strip(),
+                        'role': 'subs',
+                        'minutes': 90 - played if minute else None})
+    return players
+
+
+def goals(tag) -> list:
+    """same as bench.get_goal_scorer(), only items with player link count"""
+    if not tag.div:  # no goals
+        return []
+
+    scorers = []  # list of dicts
+    for item in tokenize(tag, GOAL_TOKENS, skip=('h4',)):
+        if not item.ids:
+            continue
+        minute, name = minute_and_name(clean(item.text))
+        goal_type = 'regular'
+        if '(' in name:  # behind name is (p.) or (vl.)
+            name, goal_info = name.split('(', 1)
+            name = name.strip()
+            if goal_info.startswith('p'):
+                goal_type = 'penalty'
+            elif goal_info.startswith('v'):
+                goal_type = 'own'
+            else:
+                goal_type = 'unknown'
+        scorers.append({'player_id': item.ids[0][1], 'name': name,
+                        'minute': minute, 'goal_type': goal_type})
+    return scorers
+
+
+def cards(tag) -> list:
+    """same as bench.cards_received(), yellow cards first, then red ones"""
+    if not tag:
+        return []
+
+    colors = {'ŽK:': 'yellow', 'ČK:': 'red'}
+    found = {'yellow': [], 'red': []}
+    for item in tokenize(tag, CARD_TOKENS):
+        if item.section not in colors or not item.ids:
+            continue
+        minute, name = minute_and_name(SPACE_DOT.sub("", clean(item.text)))
+        color = colors[item.section]
+        found[color].append({'player_id': item.ids[0][1], 'name': name,
+                             'minute': minute, 'card': color})
+    return found['yellow'] + found['red']
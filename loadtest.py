@@ -0,0 +1,108 @@
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from metrics import Histogram
+
+
+def make_paths(url: str, seed: int = 1) -> list:
+    """
+    paths a dashboard asks for - standings, matches, teams, players
+    and dates of the leagues on the server
+    """
+    rand = random.Random(seed)
+    paths = []
+    for league in requests.get(url + '/leagues', timeout=10).json():
+        league_path = f'/leagues/{league["competition_id"]}'
+        games = requests.get(url + league_path + '/matches', timeout=10).json()
+        if not games:
+            continue
+        rounds = sorted({game["round"] for game in games})
+        paths += [league_path, league_path + '/standings',
+                  league_path + '/standings?side=home',
+                  league_path + '/standings?form=5']
+        paths += [f'{league_path}/standings?round={round_num}'
+                  for round_num in rounds]
+        paths += [f'{league_path}/matches?round={round_num}'
+                  for round_num in rounds]
+        for game in rand.sample(games, min(20, len(games))):
+            paths.append(f'/matches/{game["match_id"]}')
+            paths.append(f'/dates/{game["datetime"][:10]}')
+            if game.get("home_team_id"):
+                paths.append(f'/teams/{game["home_team_id"]}')
+            for player in game.get("home_lineup", [])[:2]:
+                if player["player_id"]:
+                    paths.append(f'/players/{player["player_id"]}')
+    return paths
+
+
+def load_test(url: str, paths: list, count: int = 2000,
+              concurrency: int = 8, seed: int = 2) -> dict:
+    """
+    send count requests for random paths from concurrency threads,
+    each with its own keep-alive session, return latencies and errors
+    """
+    rand = random.Random(seed)
+    chosen = [rand.choice(paths) for _ in range(count)]
+    histogram = Histogram()
+    errors = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def get(path):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            r = local.session.get(url + path, timeout=10)
+            failed = r.status_code != 200 and f'{path}: {r.status_code}'
+        except requests.exceptions.RequestException as e:
+            failed = f'{path}: {e}'
+        elapsed = time.perf_counter() - start
+        with lock:
+            histogram.add(elapsed * 1000)
+            if failed:
+                errors.append(failed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(get, chosen))
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "requests_per_second": count / seconds,
+            "latency": histogram.as_dict(), "errors": errors}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Load test of serve.py - many clients ask for standings, matches, teams \
+    and players at once. Prints requests per second, latency and cache hit \
+    rate of the server.""")
+    parser.add_argument("url", nargs='?', default='http://127.0.0.1:8080')
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    arguments = parser.parse_args()
+    server_url = arguments.url.rstrip('/')
+
+    test_paths = make_paths(server_url)
+    if not test_paths:
+        raise SystemExit('The server has no leagues with games')
+    result = load_test(server_url, test_paths, arguments.requests,
+                       arguments.concurrency)
+    latency = result["latency"]
+    print(f'{arguments.requests} requests in {result["seconds"]:.2f} s, '
+          f'{result["requests_per_second"]:.0f} requests/s, '
+          f'{len(result["errors"])} errors')
+    print(f'Latency: mean {latency["mean_ms"]:.2f} ms, p50 '
+          f'{latency["p50_ms"]} ms, p90 {latency["p90_ms"]} ms, p99 '
+          f'{latency["p99_ms"]} ms, max {latency["max_ms"]:.1f} ms')
+    for error in result["errors"][:10]:
+        print('   ', error)
+    server = requests.get(server_url + '/metrics', timeout=10).json()
+    print(f'Server: cache hit rate {server["gauges"]["cache_hit_rate"]}, '
+          f'{server["gauges"]["reloads"]} reloads')
+    for route, histogram in server["stages"].items():
+        print(f'    {route:<22}{histogram["count"]:>7}x '
+              f'{histogram["mean_ms"]:>8.3f} ms mean '
+              f'{histogram["p99_ms"]:>6} ms p99')
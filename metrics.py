@@ -0,0 +1,153 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# upper bounds of histogram buckets in milliseconds
+BUCKETS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000,
+           5000, 10000)
+
+
+class Histogram:
+    """latencies of one stage in buckets, so memory doesn't grow with run"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = self.min = self.max = 0.0  # milliseconds
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is over 10 s
+
+    def add(self, ms: float) -> None:
+        self.min = ms if not self.count else min(self.min, ms)
+        self.max = max(self.max, ms)
+        self.count += 1
+        self.total += ms
+        for num, bound in enumerate(BUCKETS):
+            if ms <= bound:
+                self.buckets[num] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def merge(self, data: dict) -> None:
+        """add histogram from as_dict() of other Histogram"""
+        if not data["count"]:
+            return
+        self.min = data["min_ms"] if not self.count else min(self.min,
+                                                             data["min_ms"])
+        self.max = max(self.max, data["max_ms"])
+        self.count += data["count"]
+        self.total += data["total_ms"]
+        for num, count in enumerate(data["buckets"].values()):
+            self.buckets[num] += count
+
+    def percentile(self, share: float) -> float:
+        """
+        upper bound of the bucket with the percentile, but never more than
+        the longest latency
+        """
+        needed = share * self.count
+        seen = 0
+        for num, count in enumerate(self.buckets):
+            seen += count
+            if seen >= needed and count:
+                if num < len(BUCKETS):
+                    return min(BUCKETS[num], round(self.max, 3))
+                break
+        return round(self.max, 3)
+
+    def as_dict(self) -> dict:
+        names = [f'<={bound}' for bound in BUCKETS] + [f'>{BUCKETS[-1]}']
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0,
+            "min_ms": round(self.min, 3),
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip(names, self.buckets)),
+        }
+
+
+class Metrics:
+    """
+    Counters (requests, bytes, retries, skipped games, ...), latency
+    histograms of stages and gauges with the last value (e.g. current rate).
+    Stage names are 'stage.page_kind', e.g. fetch.match, parse.schedule
+    or extract.goals.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.stages = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages.setdefault(stage, Histogram()).add(seconds * 1000)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(sorted(self.counters.items())),
+                "stages": {stage: histogram.as_dict() for stage, histogram
+                           in sorted(self.stages.items())},
+                "gauges": dict(sorted(self.gauges.items())),
+            }
+
+    def merge(self, data: dict) -> None:
+        """add metrics from as_dict() of other Metrics, e.g. from process"""
+        with self._lock:
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for stage, histogram in data["stages"].items():
+                self.stages.setdefault(stage, Histogram()).merge(histogram)
+            self.gauges.update(data.get("gauges", {}))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters = {}
+            self.stages = {}
+            self.gauges = {}
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.as_dict(), file, indent=4)
+
+    def summary(self) -> str:
+        """few lines about the slowest stages for the end of the run"""
+        data = self.as_dict()
+        lines = ['Counters: ' + ', '.join(f'{name} {value}' for name, value
+                                          in data["counters"].items())]
+        if data["gauges"]:
+            lines.append('Gauges: ' + ', '.join(
+                f'{name} {value}' for name, value in data["gauges"].items()))
+        for stage, histogram in sorted(data["stages"].items(),
+                                       key=lambda item: -item[1]["total_ms"]):
+            lines.append(f'{stage:<20}{histogram["count"]:>6}x '
+                         f'{histogram["total_ms"] / 1000:>8.2f} s total '
+                         f'{histogram["mean_ms"]:>9.2f} ms mean '
+                         f'{histogram["p90_ms"]:>6} ms p90')
+        return '\n'.join(lines)
+
+
+# metrics of whole run, shared by all modules
+METRICS = Metrics()
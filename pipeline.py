@@ -0,0 +1,91 @@
+import io
+import os
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import utils
+from client import FetchError
+from metrics import METRICS
+
+
+def parse_match_page(content: bytes, game: dict, level: str,
+                     parser: str) -> tuple:
+    """
+    runs in parser process - return tuple (match_info, printed text,
+    metrics of parsing). Text printed while parsing is printed later
+    by the main process, metrics are added to its METRICS.
+    """
+    utils.HTML_PARSER = parser
+    METRICS.reset()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        with METRICS.timer('parse.match'):
+            soup = utils.make_match_soup(content, game)
+        with METRICS.timer('extract.match'):
+            match_info = utils.scrap_match_detail(soup, game, level)
+    return match_info, output.getvalue(), METRICS.as_dict()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def shared_pool(processes: int = 0) -> ProcessPoolExecutor:
+    """
+    return pool of parser processes (0 - one for each core) shared by all
+    leagues scraped at once, so they don't start `processes` processes
+    each. The pool is made by the first call, when download threads
+    already run, so processes are not forked from this process (a lock
+    held by other thread, e.g. of METRICS, would stay locked in them).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = ('forkserver' if 'forkserver' in
+                      multiprocessing.get_all_start_methods() else 'spawn')
+            _pool = ProcessPoolExecutor(
+                max_workers=processes or os.cpu_count(),
+                mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def parse_pages(games, pages, level: str = 'full', processes: int = 0,
+                depth: int = None):
+    """
+    parse match pages in shared_pool() of parser processes.
+    games and pages are iterables in the same order, pages are responses
+    or FetchError from utils.fetch_pages().
+    Yield tuple from parse_match_page() or FetchError in the same order.
+    At most `depth` pages (default 2 for each process) wait for parsing,
+    so memory doesn't grow with the number of games.
+    When the generator is closed, waiting pages are not parsed.
+    """
+    pool = shared_pool(processes)
+    depth = depth or 2 * (processes or os.cpu_count())
+    pending = deque()
+    try:
+        for game, r in zip(games, pages):
+            if isinstance(r, FetchError):
+                pending.append(r)
+            else:
+                pending.append(pool.submit(parse_match_page, r.content,
+                                           game, level, utils.HTML_PARSER))
+            if len(pending) >= depth:
+                yield result(pending.popleft())
+        while pending:
+            yield result(pending.popleft())
+    finally:  # consumer stopped early
+        for item in pending:
+            if not isinstance(item, FetchError):
+                item.cancel()
+        if hasattr(pages, 'close'):
+            pages.close()
+
+
+def result(item):
+    """FetchError stays as it is, future gives result of parsing"""
+    if isinstance(item, FetchError):
+        return item
+    return item.result()
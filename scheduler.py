@@ -0,0 +1,167 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from metrics import METRICS
+
+
+class HostScheduler:
+    """
+    Shared by all clients of the run, so all leagues together stay polite.
+    For each host it allows at most `concurrency` requests at once
+    and starts at most `rate` requests per second.
+    0 means no limit.
+    """
+
+    def __init__(self, rate: float = 5, concurrency: int = 8):
+        self.rate = rate
+        self.concurrency = concurrency
+        self._hosts = {}  # host -> [semaphore, time of next allowed start]
+        self._lock = threading.Lock()
+
+    def _host(self, link: str) -> list:
+        host = urlparse(link).netloc
+        with self._lock:
+            if host not in self._hosts:
+                semaphore = (threading.BoundedSemaphore(self.concurrency)
+                             if self.concurrency else None)
+                self._hosts[host] = [semaphore, time.monotonic()]
+            return self._hosts[host]
+
+    @contextmanager
+    def slot(self, link: str):
+        """wait until request to host of the link can start"""
+        host = self._host(link)
+        semaphore = host[0]
+        if semaphore:
+            semaphore.acquire()
+        try:
+            if self.rate:
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, host[1])
+                    host[1] = start + 1 / self.rate
+                time.sleep(start - now)
+            yield
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    def feedback(self, link: str, seconds: float, status: int = None,
+                 retry_after: float = None) -> None:
+        """fixed limits don't depend on how the requests went"""
+
+
+# changes of latency smaller than this (seconds) are taken as noise
+JITTER = 0.05
+
+
+class HostState:
+    """what AdaptiveScheduler knows about one host"""
+
+    def __init__(self, rate: float, concurrency: int):
+        self.rate = rate  # requests per second
+        self.limit = concurrency  # requests at once
+        self.active = 0  # requests running now
+        self.next_start = self.paused_until = self.last_cut = 0.0
+        self.latency = None  # moving average, seconds
+        self.best = None  # the lowest latency seen
+        self.slow_start = True  # until the first cut, rate grows faster
+
+
+class AdaptiveScheduler(HostScheduler):
+    """
+    HostScheduler which finds out how many requests the host can take (AIMD).
+    It starts at `start_rate` requests per second, which doubles with each
+    fast response until the first problem (slow start). Then each fast
+    response adds `step` to the rate, up to `rate`. Response `slow` times
+    slower than the best one cuts the rate by a quarter, 429, 503 and other
+    server or network errors halve it, never under `min_rate`. Rate is cut
+    at most once per latency, so one burst of errors counts only once.
+    Retry-After header stops all requests to the host for that time.
+    Requests at once follow rate * latency, from 1 up to `concurrency`.
+    Current rate and concurrency of each host are in METRICS gauges.
+    """
+
+    def __init__(self, rate: float = 5, concurrency: int = 8,
+                 min_rate: float = 0.5, start_rate: float = 1,
+                 step: float = 0.2, slow: float = 3):
+        super().__init__(rate, concurrency)
+        self.min_rate = min_rate
+        self.start_rate = max(min_rate, min(start_rate, rate))
+        self.step = step
+        self.slow = slow
+        self._changed = threading.Condition(self._lock)
+
+    def _host(self, link: str) -> HostState:
+        host = urlparse(link).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostState(self.start_rate, 1)
+            return self._hosts[host]
+
+    @contextmanager
+    def slot(self, link: str):
+        host = self._host(link)
+        with self._changed:
+            while host.active >= host.limit:
+                self._changed.wait()
+            host.active += 1
+            now = time.monotonic()
+            start = max(now, host.next_start, host.paused_until)
+            host.next_start = start + 1 / host.rate
+        try:
+            time.sleep(start - now)
+            yield
+        finally:
+            with self._changed:
+                host.active -= 1
+                self._changed.notify_all()
+
+    def feedback(self, link: str, seconds: float, status: int = None,
+                 retry_after: float = None) -> None:
+        """
+        tell the scheduler how the request went - seconds until response,
+        http status (None for network error) and Retry-After in seconds
+        """
+        host = self._host(link)
+        with self._changed:
+            now = time.monotonic()
+            if status is not None and status < 500 and status != 429:
+                host.latency = seconds if host.latency is None else \
+                    0.8 * host.latency + 0.2 * seconds
+                host.best = seconds if host.best is None else \
+                    min(host.best, seconds)
+                if seconds > max(self.slow * host.best, host.best + JITTER):
+                    self._cut(host, 0.75, now)
+                elif host.slow_start:
+                    host.rate = min(self.rate, host.rate * 2)
+                else:
+                    host.rate = min(self.rate, host.rate + self.step)
+            else:  # server is overloaded or failing
+                self._cut(host, 0.5, now)
+            if retry_after:
+                host.paused_until = max(host.paused_until, now + retry_after)
+            needed = math.ceil(host.rate * (host.latency or 0)) + 1
+            host.limit = max(1, min(needed, self.concurrency or needed))
+            self._changed.notify_all()
+        name = urlparse(link).netloc
+        METRICS.gauge(f'rate.{name}', round(host.rate, 2))
+        METRICS.gauge(f'concurrency.{name}', host.limit)
+
+    def _cut(self, host: HostState, factor: float, now: float) -> None:
+        if now - host.last_cut < (host.latency or 0):
+            return
+        host.rate = max(self.min_rate, host.rate * factor)
+        host.last_cut = now
+        host.slow_start = False
+        METRICS.count('rate_cuts')
+
+    def state(self) -> dict:
+        """current rate, concurrency and latency of each host"""
+        with self._lock:
+            return {name: {"rate": round(host.rate, 2),
+                           "concurrency": host.limit,
+                           "latency_ms": round((host.latency or 0) * 1000, 1)}
+                    for name, host in self._hosts.items()}
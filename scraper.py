@@ -1,30 +1,86 @@
 import os
 import json
+import time
+import pstats
+import datetime
+import cProfile
 import argparse
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import utils
+from client import Client
+from cache import PageCache
+from fixtures import Recorder
+from scheduler import HostScheduler, AdaptiveScheduler
+from journal import GameJournal, GamesFile, dump_games
+from store import GameStore, PARQUET
+from discover import Frontier, crawl
+from archive import PageArchive, ArchiveClient
+from changes import ChangeFeed
+from metrics import METRICS
 
 
-def get_league_id(args) -> str:
+def profile_threads(profiles: list) -> None:
+    """
+    profile also threads started from now on (downloads of pages, leagues
+    scraped in parallel), each by its own cProfile.Profile put into
+    profiles, because cProfile sees only the thread it was enabled in
+    """
+    def start(frame, event, arg):
+        profile = cProfile.Profile()
+        profiles.append(profile)
+        profile.enable()  # replaces this function in the thread
+
+    threading.setprofile(start)
+
+
+def get_league_ids(args) -> list:
     """"
-    Check if league_id is parsed in program arguments by user.
-    If not ask user for league_id and return it
+    Collect league ids parsed in program arguments or in file by user.
+    If there are none, ask user for league_id and return list with it
     """
-    if args.league:
-        id_league = args.league
-    else:
-        id_league = utils.user_input_num_league()
-    return id_league
+    ids = list(args.league or [])
+    if args.leagues_file:
+        with open(args.leagues_file) as file:
+            for line in file:
+                line = line.split('#')[0].strip()  # comments are allowed
+                if line:
+                    ids.append(line)
+    if not ids:
+        ids.append(utils.user_input_num_league())
+    return list(dict.fromkeys(ids))  # without duplicates
+
+
+def discover_leagues(args, client: Client) -> list:
+    """
+    Crawl the website from pages of leagues given by user (or from the main
+    page) and return ids of all leagues found. The frontier is saved in file
+    args.discover, so stopped crawl continues where it stopped.
+    """
+    ids = get_league_ids(args) if args.league or args.leagues_file else []
+    seeds = [MAIN_LINK + PATH + id_league + '/' for id_league in ids]
+    frontier = Frontier(args.discover)
+    try:
+        league_ids = crawl(frontier, seeds or [MAIN_LINK + '/'], MAIN_LINK,
+                           client, args.depth, args.max_pages)
+        counts = frontier.counts()
+    finally:
+        frontier.close()
+    print(f'Found {len(league_ids)} leagues, '
+          f'{counts.get("done", 0)} pages crawled, '
+          f'{counts.get("queued", 0)} pages waiting')
+    return league_ids
 
 
-def basic_connection(id_league):
+def basic_connection(id_league, client: Client = None):
     """
     Check if league_id is valid. If not program quits.
     Return bs4.element.Tag
     """
-    league_link = MAIN_LINK + PATH + id_league
-    r = utils.check_response(league_link)
-    soup = BeautifulSoup(r.content, 'html.parser')
+    league_link = MAIN_LINK + PATH + id_league + '/'
+    r = utils.check_response(league_link, client, 'league')
+    with METRICS.timer('parse.league'):
+        soup = utils.make_soup(r.content, utils.LEAGUE_MENU)
     league_tag = soup.header.find('div', {
         'class': 'secondary-menu secondary-menu-soutez'})
     if not league_tag:
@@ -35,30 +91,152 @@ def basic_connection(id_league):
     return league_tag
 
 
-def scrape_base_info(tag) -> dict:
+def scrape_base_info(tag, client: Client = None) -> dict:
     """Scrape basic info from bs4.element.Tag"""
     tag_league_info = tag.find('a', string="Tabulka")
     link_league_info = MAIN_LINK + tag_league_info['href']
-    return utils.scrap_basic_info_league(link_league_info)
+    return utils.scrap_basic_info_league(link_league_info, client)
 
 
-def scrape_all_games(tag) -> dict:
-    """Scrape all the games in the league from bs4.element.Tag"""
+def scrape_all_games(tag, workers: int = 1, client: Client = None,
+                     saved_games: dict = None, level: str = 'full',
+                     journal: GameJournal = None, processes: int = 1) -> dict:
+    """
+    Scrape all the games in the league from bs4.element.Tag,
+    with `workers` match pages downloaded at once
+    and parsed by `processes` processes.
+    Games from saved_games with unchanged result are not scraped again.
+    Each scraped game is written into journal right away.
+    """
     tag_all_games = tag.find('a', string="Rozlosování")
     link_games = MAIN_LINK + tag_all_games['href']
-    return utils.scrap_games_in_league(link_games)
+    return utils.scrap_games_in_league(link_games, workers, client,
+                                       saved_games, level, journal,
+                                       processes)
+
+
+def scrape_league(id_league: str, client: Client = None, workers: int = 1,
+                  saved_games: dict = None, level: str = 'full',
+                  journal: GameJournal = None, processes: int = 1) -> tuple:
+    """scrape the league and return tuple (basic_info, games)"""
+    league_info_tag = basic_connection(id_league, client)
+    base_info = scrape_base_info(league_info_tag, client)
+    all_games = scrape_all_games(league_info_tag, workers, client,
+                                 saved_games, level, journal, processes)
+    return base_info, all_games
+
+
+def load_games(id_league: str) -> dict:
+    """return games from games.json of the league, or empty dict"""
+    path = id_league + '/games.json'
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        games = json.load(file)
+    return {int(match_id): game for match_id, game in games.items()}
 
 
 def create_jsons(id_league: str, base_info: dict, all_games: dict) -> None:
-    """make/ overwrite two JSON files in folder named by league_id"""
+    """
+    make/ overwrite two JSON files in folder named by league_id.
+    Files are written under temporary name and renamed when complete,
+    so crash never leaves half written file.
+    Changes of games are logged by ChangeFeed.
+    """
     if not os.path.exists(id_league):
         os.makedirs(id_league)
+    # changes are logged first, crash before the rename only repeats them
+    # old games are read from games.json one by one, not all at once
+    if os.path.exists(id_league + '/games.json'):
+        old_games = GamesFile(id_league + '/games.json')
+        try:
+            ChangeFeed(id_league).record(old_games, all_games)
+        finally:
+            old_games.close()
+    else:
+        ChangeFeed(id_league).record({}, all_games)
 
-    with open(id_league + '/basic.json', 'w') as file:
+    with open(id_league + '/basic.json.tmp', 'w') as file:
         json.dump(base_info, file, indent=4, ensure_ascii=False)
+    os.replace(id_league + '/basic.json.tmp', id_league + '/basic.json')
+
+    with open(id_league + '/games.json.tmp', 'w') as file:
+        dump_games(all_games, file)
+    os.replace(id_league + '/games.json.tmp', id_league + '/games.json')
 
-    with open(id_league + '/games.json', 'w') as file:
-        json.dump(all_games, file, indent=4, ensure_ascii=False)
+
+def run_league(id_league: str, client: Client, workers: int = 1,
+               update: bool = False, level: str = 'full',
+               recorder: Recorder = None, resume: bool = False,
+               processes: int = 1, store: GameStore = None) -> dict:
+    """
+    scrape the league, make its JSON files and return summary of the run.
+    Games are written into <league_id>/games.jsonl while scraping. If the run
+    stops, next run with resume continues from there. When JSON files are
+    made, the journal is removed. With store the league is saved
+    into its database as well.
+    """
+    start = time.perf_counter()
+    summary = {"league_id": id_league, "games": 0, "failed": False}
+    saved = load_games(id_league) if update else None
+    journal = GameJournal(id_league + '/games.jsonl', resume)
+    if len(journal):
+        print(f'Resuming league {id_league}, '
+              f'{len(journal)} games are already scraped')
+    try:
+        basic_info, games = scrape_league(id_league, client, workers, saved,
+                                          level, journal, processes)
+    except SystemExit:  # league doesn't exist or page couldn't be downloaded
+        summary["failed"] = True
+        journal.close(remove=not len(journal))
+        if not os.listdir(id_league):  # made only for the empty journal
+            os.rmdir(id_league)
+    else:
+        create_jsons(id_league, basic_info, games)
+        if store:
+            store.save(basic_info, games)
+        journal.close(remove=True)
+        if recorder:
+            recorder.save_golden(id_league)
+        summary["games"] = len(games)
+    summary.update({
+        "seconds": time.perf_counter() - start,
+        "requests": client.requests,
+        "retries": client.retried,
+        "errors": client.errors,
+    })
+    return summary
+
+
+def run_leagues(ids: list, make_client, parallel: int = 1,
+                **options) -> list:
+    """
+    run more leagues at once in threads, each with its own client from
+    make_client(). Return list of summaries in the same order as ids.
+    """
+    def run(id_league):
+        client = make_client()
+        try:
+            return run_league(id_league, client, **options)
+        except Exception as e:  # one broken league doesn't stop the others
+            print(f'Unknown error by scraping league {id_league}: {e!r}')
+            return {"league_id": id_league, "games": 0, "failed": True,
+                    "seconds": 0, "requests": client.requests,
+                    "retries": client.retried, "errors": client.errors + 1}
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+        return list(executor.map(run, ids))
+
+
+def print_summary(summaries: list) -> None:
+    print('\nSummary:')
+    for summary in summaries:
+        state = 'FAILED' if summary["failed"] else f'{summary["games"]} games'
+        print(f'League {summary["league_id"]}: {summary["seconds"]:.1f} s, '
+              f'{state}, {summary["requests"]} requests, '
+              f'{summary["retries"]} retries, {summary["errors"]} errors')
 
 
 MAIN_LINK = "https://fotbalunas.cz"
@@ -72,12 +250,251 @@ if __name__ == '__main__':
     download all info about the league and played games.\
     If you don't parse the league number you have to provide valid http link \
     inside the program.""")
-    parser.add_argument("-l", "--league")
+    parser.add_argument("-l", "--league", nargs='+',
+                        help="one or more league ids")
+    parser.add_argument("--leagues-file", metavar="FILE",
+                        help="file with league ids, one on each line")
+    parser.add_argument("--discover", metavar="FILE",
+                        help="find leagues by crawling the website from "
+                             "given leagues (or main page) and scrape them, "
+                             "crawl is saved in FILE and can be continued. "
+                             "Turns on --cache, so pages are downloaded once")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="how far from the start the crawl goes")
+    parser.add_argument("--max-pages", type=int,
+                        help="stop the crawl after this number of pages")
+    parser.add_argument("--discover-only", action='store_true',
+                        help="only print found leagues, don't scrape them")
+    parser.add_argument("--watch", action='store_true',
+                        help="keep running and scrape games of the leagues "
+                             "when they are finished")
+    parser.add_argument("--after", type=float, default=120,
+                        help="minutes after kickoff when game is scraped")
+    parser.add_argument("--retry-every", type=float, default=15,
+                        help="minutes until game without result or lineups "
+                             "is tried again")
+    parser.add_argument("--give-up", type=float, default=48,
+                        help="hours after kickoff when game is not tried "
+                             "any more")
+    parser.add_argument("--once", action='store_true',
+                        help="with --watch check the leagues only once, "
+                             "e.g. when run by cron")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="serve the leagues as JSON on localhost:PORT "
+                             "for dashboards, during --watch, otherwise "
+                             "after the scrape until Ctrl-C")
+    parser.add_argument("--coordinator", metavar="QUEUE",
+                        help="put the leagues into shared work queue (SQLite "
+                             "file) for --worker processes, even on more "
+                             "machines, and make JSON files from results")
+    parser.add_argument("--worker", metavar="QUEUE",
+                        help="scrape pages from shared work queue until "
+                             "the coordinator finishes it")
+    parser.add_argument("--lease", type=float, default=120,
+                        help="seconds after which item of the work queue, "
+                             "which isn't done, is given to another worker")
+    parser.add_argument("--parallel", type=int, default=4,
+                        help="number of leagues scraped at once")
+    parser.add_argument("--rate", type=float, default=5,
+                        help="maximum requests per second to the website "
+                             "for all leagues together (0 - no limit)")
+    parser.add_argument("--min-rate", type=float, default=0.5,
+                        help="the rate is never slowed down under this")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="maximum requests at once to the website "
+                             "for all leagues together (0 - no limit)")
+    parser.add_argument("--fixed-rate", action='store_true',
+                        help="always use --rate and --concurrency, don't "
+                             "adapt them to the speed of the website")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of match pages downloaded at once")
+    parser.add_argument("-p", "--processes", type=int,
+                        help="number of processes parsing match pages "
+                             "(0 - one for each core, default 1, "
+                             "with --reparse 0)")
+    parser.add_argument("-u", "--update", action='store_true',
+                        help="scrape only games, which are not in games.json "
+                             "yet or their result changed")
+    parser.add_argument("-r", "--resume", action='store_true',
+                        help="continue stopped run, games scraped before "
+                             "the stop are not scraped again")
+    parser.add_argument("--level", choices=list(utils.LEVEL_KEYS),
+                        default='full',
+                        help="results - only from the schedule page, "
+                             "events - with goals and cards, "
+                             "full - with lineups (default)")
+    parser.add_argument("--parser", default=utils.HTML_PARSER,
+                        help="BeautifulSoup parser, e.g. lxml (much faster, "
+                             "has to be installed)")
+    parser.add_argument("--timeout", type=float, default=10,
+                        help="seconds to wait for the server on each request")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="how many times failed request is repeated")
+    parser.add_argument("--site", default=MAIN_LINK,
+                        help="scrape this copy of the website instead")
+    parser.add_argument("--cache", nargs='?', const='.cache',
+                        help="keep downloaded pages in this folder "
+                             "(default .cache) and use them next time")
+    parser.add_argument("--cache-size", type=int, default=200,
+                        help="maximum size of the cache in MB")
+    parser.add_argument("--ttl", action='append', default=[],
+                        metavar="KIND=SECONDS",
+                        help="how long are pages of kind league, table, "
+                             "schedule or match used without asking server")
+    parser.add_argument("--record", metavar="FOLDER",
+                        help="save all pages and JSON files into folder, "
+                             "which can be served by standin.py")
+    parser.add_argument("--archive", metavar="FOLDER",
+                        help="keep every version of every page compressed "
+                             "in archive folder")
+    parser.add_argument("--reparse", action='store_true',
+                        help="make JSON files only from pages in --archive, "
+                             "without network (all leagues of the archive, "
+                             "if no league is given)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="save counters and time of each stage "
+                             "(fetch, parse, extract) into JSON file")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="profile the run with cProfile, save it "
+                             "into file and print the slowest functions")
+    parser.add_argument("--sqlite", metavar="FILE",
+                        help="save leagues into SQLite database as well, "
+                             "leagues already there are updated")
+    parser.add_argument("--parquet", metavar="FOLDER",
+                        help="at the end write all tables of --sqlite "
+                             "database into Parquet files (needs pyarrow)")
     arguments = parser.parse_args()
+    if arguments.reparse and not arguments.archive:
+        parser.error("--reparse needs --archive")
+    if arguments.processes is None:
+        arguments.processes = 0 if arguments.reparse else 1
+    if arguments.parquet and not arguments.sqlite:
+        parser.error("--parquet needs --sqlite")
+    if arguments.parquet and not PARQUET:
+        parser.error("--parquet needs pyarrow, install it with "
+                     "'pip install pyarrow'")
+    MAIN_LINK = arguments.site.rstrip('/')
+    utils.HTML_PARSER = arguments.parser
 
-    league_id = get_league_id(arguments)
-    league_info_tag = basic_connection(league_id)
-    basic_info = scrape_base_info(league_info_tag)
-    games = scrape_all_games(league_info_tag)
+    if arguments.discover and not arguments.cache:
+        arguments.cache = '.cache'  # scrape uses pages from the crawl
+    page_cache = None
+    if arguments.cache:
+        ttls = {kind: float(seconds) for kind, seconds in
+                (ttl.split('=') for ttl in arguments.ttl)}
+        page_cache = PageCache(arguments.cache,
+                               arguments.cache_size * 2 ** 20, ttls)
+    recorder = Recorder(arguments.record) if arguments.record else None
+    if arguments.fixed_rate or not arguments.rate:
+        host_scheduler = HostScheduler(arguments.rate, arguments.concurrency)
+    else:
+        host_scheduler = AdaptiveScheduler(arguments.rate,
+                                           arguments.concurrency,
+                                           arguments.min_rate)
+    game_store = GameStore(arguments.sqlite) if arguments.sqlite else None
+    page_archive = None
+    if arguments.archive:
+        page_archive = PageArchive(arguments.archive)
+
+    def new_client() -> Client:
+        if arguments.reparse:
+            return ArchiveClient(page_archive)
+        return Client(timeout=arguments.timeout, retries=arguments.retries,
+                      pool_size=max(10, arguments.workers), cache=page_cache,
+                      recorder=recorder, scheduler=host_scheduler,
+                      archive=page_archive)
 
-    create_jsons(league_id, basic_info, games)
+    if arguments.worker:  # leagues are given by the coordinator
+        league_ids = []
+    elif arguments.discover:
+        http_client = new_client()
+        league_ids = discover_leagues(arguments, http_client)
+        http_client.close()
+        if arguments.discover_only or not league_ids:
+            print(' '.join(league_ids))
+            raise SystemExit
+    elif arguments.reparse and not (arguments.league
+                                    or arguments.leagues_file):
+        league_ids = page_archive.leagues()
+    else:
+        league_ids = get_league_ids(arguments)
+    read_server = None
+    if arguments.serve:
+        from serve import ReadServer
+        read_server = ReadServer(league_ids, port=arguments.serve).start()
+        print(f'Serving leagues on {read_server.url}')
+    if arguments.profile:
+        thread_profiles = []
+        profile_threads(thread_profiles)
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if arguments.worker:
+        from workqueue import WorkQueue
+        from distributed import work
+        work_queue = WorkQueue(arguments.worker, arguments.lease)
+        http_client = new_client()
+        work(work_queue, http_client, MAIN_LINK)
+        http_client.close()
+        work_queue.close()
+    elif arguments.coordinator:
+        from workqueue import WorkQueue
+        from distributed import coordinate
+        work_queue = WorkQueue(arguments.coordinator, arguments.lease)
+        print_summary(coordinate(work_queue, league_ids, arguments.level,
+                                 game_store))
+        work_queue.close()
+    elif arguments.watch:
+        from watch import watch_leagues
+        http_client = new_client()
+        for id_league in league_ids:  # scrape leagues which are not saved yet
+            if not os.path.exists(os.path.join(id_league, 'basic.json')):
+                run_league(id_league, http_client, arguments.workers,
+                           level=arguments.level, store=game_store)
+        watch_leagues(league_ids, http_client, arguments.level, MAIN_LINK,
+                      game_store, arguments.once,
+                      after=datetime.timedelta(minutes=arguments.after),
+                      retry=datetime.timedelta(minutes=arguments.retry_every),
+                      give_up=datetime.timedelta(hours=arguments.give_up))
+        http_client.close()
+    elif len(league_ids) == 1:
+        http_client = new_client()
+        run_league(league_ids[0], http_client, arguments.workers,
+                   arguments.update, arguments.level, recorder,
+                   arguments.resume, arguments.processes, game_store)
+        http_client.close()
+    else:
+        print_summary(run_leagues(league_ids, new_client, arguments.parallel,
+                                  workers=arguments.workers,
+                                  update=arguments.update,
+                                  level=arguments.level, recorder=recorder,
+                                  resume=arguments.resume,
+                                  processes=arguments.processes,
+                                  store=game_store))
+    if arguments.profile:
+        profiler.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(profiler)
+        for thread_profile in thread_profiles:  # all threads together
+            stats.add(thread_profile)
+        stats.dump_stats(arguments.profile)
+        print(f'Profile of {len(thread_profiles) + 1} threads')
+        stats.sort_stats('cumulative').print_stats(20)
+    if game_store:
+        if arguments.parquet:
+            game_store.export_parquet(arguments.parquet)
+        game_store.close()
+    if page_cache:
+        print(page_cache.summary())
+    if page_archive:
+        print(page_archive.summary())
+        page_archive.close()
+    if arguments.metrics:
+        METRICS.save(arguments.metrics)
+        print(METRICS.summary())
+    if read_server:
+        print(f'Serving leagues on {read_server.url}, stop it by Ctrl-C')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            read_server.shutdown()
@@ -0,0 +1,359 @@
+import os
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import analytics
+from metrics import Metrics
+
+CHECK_EVERY = 1.0  # seconds between checks if files of a league changed
+FILES = ('basic.json', 'games.json')
+
+
+def league_folders(folder: str = '.') -> list:
+    """ids of scraped leagues - subfolders with basic.json and games.json"""
+    return sorted(name for name in os.listdir(folder) if all(
+        os.path.isfile(os.path.join(folder, name, file)) for file in FILES))
+
+
+def team_key(match_info: dict, side: str) -> str:
+    """team id, or name of the team for games without ids"""
+    team_id = match_info.get(side + '_team_id')
+    return str(team_id) if team_id is not None else match_info[side + '_team']
+
+
+def player_ids(match_info: dict) -> set:
+    """ids of players in lineups, goals and cards of the game"""
+    players = (match_info.get("home_lineup", []) +
+               match_info.get("away_lineup", []) +
+               match_info.get("goals", []) + match_info.get("cards", []))
+    return {player["player_id"] for player in players
+            if player["player_id"] is not None}
+
+
+class LeagueData:
+    """
+    One league from its JSON files in memory, with indexes of its games
+    by round, team, player and date, and computed standings.
+    A new LeagueData is made when the files change, so nothing in it
+    has to be invalidated.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.signature = self.files_signature()
+        with open(os.path.join(folder, 'basic.json')) as file:
+            self.basic_info = json.load(file)
+        with open(os.path.join(folder, 'games.json')) as file:
+            self.games = {int(match_id): match_info for match_id, match_info
+                          in json.load(file).items()}
+        self.by_round, self.by_team = {}, {}
+        self.by_player, self.by_date = {}, {}
+        for match_id, match_info in self.games.items():
+            keys = ((self.by_round, [match_info["round"]]),
+                    (self.by_team, [team_key(match_info, 'home'),
+                                    team_key(match_info, 'away')]),
+                    (self.by_player, player_ids(match_info)),
+                    (self.by_date, [match_info["datetime"][:10]]))
+            for index, values in keys:
+                for value in values:
+                    index.setdefault(value, []).append(match_id)
+        self.last_round = max(self.by_round, default=0)
+        self.checked = time.monotonic()
+        self.columns = None  # analytics.Games, made for the first standings
+        self.standings = {}  # (round, side, form) -> rows
+        self._lock = threading.Lock()
+
+    def files_signature(self) -> tuple:
+        """modification times and sizes of the JSON files"""
+        stats = [os.stat(os.path.join(self.folder, name)) for name in FILES]
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
+
+    def changed(self) -> bool:
+        """True if the files changed on disk, checked once in CHECK_EVERY"""
+        now = time.monotonic()
+        if now - self.checked < CHECK_EVERY:
+            return False
+        self.checked = now
+        try:
+            return self.files_signature() != self.signature
+        except FileNotFoundError:  # being replaced right now
+            return False
+
+    def matches(self, round: int = None, team: str = None,
+                player: str = None, date: str = None) -> list:
+        """games which fit all given filters, by the smallest index"""
+        found = None
+        for index, value in ((self.by_round, round), (self.by_team, team),
+                             (self.by_player, player),
+                             (self.by_date, date)):
+            if value is not None:
+                ids = index.get(value, [])
+                found = set(ids) if found is None else found & set(ids)
+        if found is None:
+            found = self.games
+        return [self.games[match_id] for match_id in sorted(
+            found, key=lambda match_id: self.games[match_id]["datetime"])]
+
+    def table(self, round: int = None, side: str = 'all',
+              form: int = None) -> tuple:
+        """
+        standings and True if they were in the cache. ValueError for
+        unknown side or form under 1, checked before the cache is used,
+        so it keeps only the tables a league can have
+        """
+        if side not in analytics.SIDES:
+            raise ValueError(f'side must be one of '
+                             f'{", ".join(analytics.SIDES)}')
+        if form is not None:
+            if form < 1:
+                raise ValueError('form must be at least 1')
+            form = min(form, len(self.games))
+        if round is not None:
+            round = max(round, 0)
+            if round >= self.last_round:
+                round = None  # the same table as after the last round
+        key = (round, side if not form else 'all', form)
+        with self._lock:
+            if key in self.standings:
+                return self.standings[key], True
+            if self.columns is None:
+                self.columns = analytics.Games(self.games.values())
+            if form:
+                rows = analytics.form_table(self.columns, form, round=round)
+            else:
+                rows = analytics.league_table(self.columns, round=round,
+                                              side=side)
+            self.standings[key] = rows
+            return rows, False
+
+
+class DataStore:
+    """
+    leagues in memory, each reloaded when its files change. Without ids
+    all leagues in the folder are served, also the ones scraped later
+    """
+
+    def __init__(self, ids: list = None, folder: str = '.'):
+        self.folder = folder
+        self.fixed = ids is not None
+        self.ids = [str(id_league) for id_league in ids or []]
+        self.listed = 0.0  # time.monotonic() of the last listdir
+        self.leagues = {}  # league id -> LeagueData
+        self.reloads = 0
+        self._lock = threading.Lock()
+
+    def league_ids(self) -> list:
+        if not self.fixed and time.monotonic() - self.listed >= CHECK_EVERY:
+            self.listed = time.monotonic()
+            self.ids = league_folders(self.folder)
+        return self.ids
+
+    def league(self, id_league: str) -> LeagueData:
+        """LeagueData with current files, None if it isn't scraped"""
+        if id_league not in self.league_ids():
+            return None
+        league = self.leagues.get(id_league)
+        if league is not None and not league.changed():
+            return league
+        with self._lock:
+            league = self.leagues.get(id_league)
+            if league is None or league.files_signature() != \
+                    league.signature:
+                path = os.path.join(self.folder, id_league)
+                try:
+                    league = LeagueData(path)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    return league  # not scraped yet, or the old data
+                self.leagues[id_league] = league
+                self.reloads += 1
+            return league
+
+    def all_leagues(self) -> list:
+        return [league for league in map(self.league, self.league_ids())
+                if league is not None]
+
+    def match(self, match_id: int) -> dict:
+        for league in self.all_leagues():
+            if match_id in league.games:
+                return league.games[match_id]
+        return None
+
+    def player(self, player_id: str) -> dict:
+        """stats of the player in each league and the games"""
+        leagues, games = [], []
+        for league in self.all_leagues():
+            played = league.matches(player=player_id)
+            if not played:
+                continue
+            stats = {"competition_id": league.basic_info["competition_id"],
+                     "season_name": league.basic_info["season_name"],
+                     "appearances": 0, "starts": 0, "minutes": 0,
+                     "goals": 0, "own_goals": 0, "yellow_cards": 0,
+                     "red_cards": 0}
+            for match_info in played:
+                for player in (match_info.get("home_lineup", []) +
+                               match_info.get("away_lineup", [])):
+                    if player["player_id"] == player_id:
+                        stats["appearances"] += 1
+                        stats["starts"] += player["role"] == 'start'
+                        stats["minutes"] += player["minutes"] or 0
+                for goal in match_info.get("goals", []):
+                    if goal["player_id"] == player_id:
+                        stats["own_goals" if goal["goal_type"] == 'own'
+                              else "goals"] += 1
+                for card in match_info.get("cards", []):
+                    if card["player_id"] == player_id:
+                        stats[card["card"] + '_cards'] += 1
+            leagues.append(stats)
+            games.extend(played)
+        return {"player_id": player_id, "leagues": leagues,
+                "matches": games}
+
+
+class ReadHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive for pollers
+    wbufsize = 2 ** 16  # headers and body in one packet, no delayed ACK
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = {name: values[-1]
+                 for name, values in parse_qs(url.query).items()}
+        try:
+            route, status, body = self.answer(parts, query)
+        except (ValueError, KeyError) as e:
+            route, status, body = 'bad_request', 400, {"error": str(e)}
+        self.send_json(status, body)
+        self.server.metrics.record('serve.' + route,
+                                   time.perf_counter() - start)
+
+    def answer(self, parts: list, query: dict) -> tuple:
+        """return (route name for metrics, http status, data)"""
+        store = self.server.store
+        if parts == ['leagues']:
+            return 'leagues', 200, [
+                dict(league.basic_info, games=len(league.games))
+                for league in store.all_leagues()]
+        if parts[:1] == ['leagues'] and len(parts) in (2, 3):
+            league = store.league(parts[1])
+            if league is None:
+                return 'not_found', 404, {"error": "league not found"}
+            round_num = int(query["round"]) if "round" in query else None
+            if len(parts) == 2:
+                return 'league', 200, league.basic_info
+            if parts[2] == 'matches':
+                return 'league_matches', 200, league.matches(
+                    round_num, query.get("team"), query.get("player"),
+                    query.get("date"))
+            if parts[2] == 'standings':
+                form = int(query["form"]) if "form" in query else None
+                rows, hit = league.table(round_num,
+                                         query.get("side", 'all'), form)
+                self.server.metrics.count('cache_hits' if hit
+                                          else 'cache_misses')
+                return 'standings', 200, rows
+        if len(parts) == 2:
+            kind, key = parts
+            if kind == 'matches':
+                match_info = store.match(int(key))
+                if match_info is not None:
+                    return 'match', 200, match_info
+            elif kind == 'teams':
+                return 'team', 200, [
+                    match_info for league in store.all_leagues()
+                    for match_info in league.matches(team=key)]
+            elif kind == 'players':
+                return 'player', 200, store.player(key)
+            elif kind == 'dates':
+                return 'date', 200, [
+                    match_info for league in store.all_leagues()
+                    for match_info in league.matches(date=key)]
+        if parts == ['metrics']:
+            return 'metrics', 200, self.server.report()
+        return 'not_found', 404, {"error": "not found"}
+
+    def send_json(self, status: int, data) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # no line for each request
+
+
+class ReadServer(ThreadingHTTPServer):
+    """
+    Local http server with JSON of scraped leagues for dashboards:
+
+        /leagues                        basic info of all leagues
+        /leagues/438                    basic info of the league
+        /leagues/438/matches            games, filters ?round=, ?team=,
+                                        ?player= and ?date=YYYY-MM-DD
+        /leagues/438/standings          table, ?round=, ?side=home|away
+                                        or ?form=5 (last 5 games)
+        /matches/1001                   one game
+        /teams/100                      games of the team in all leagues
+        /players/5001                   stats and games of the player
+        /dates/2021-08-20               games of the day
+        /metrics                        latency of requests, cache hits
+
+    Leagues are read once and kept in memory with their standings, until
+    their JSON files change.
+    """
+    daemon_threads = True
+
+    def __init__(self, ids: list = None, folder: str = '.',
+                 port: int = 8080):
+        super().__init__(('127.0.0.1', port), ReadHandler)
+        self.store = DataStore(ids, folder)
+        self.metrics = Metrics()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}'
+
+    def report(self) -> dict:
+        data = self.metrics.as_dict()
+        hits = data["counters"].get('cache_hits', 0)
+        misses = data["counters"].get('cache_misses', 0)
+        data["gauges"].update({
+            "cache_hit_rate": round(hits / (hits + misses), 3)
+            if hits + misses else None,
+            "leagues": len(self.store.leagues),
+            "reloads": self.store.reloads,
+        })
+        return data
+
+    def start(self) -> 'ReadServer':
+        """serve in background thread, so it can be used inside of program"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Serve scraped leagues as JSON on localhost for dashboards. Leagues
+    are kept in memory and read again only when their files change.""")
+    parser.add_argument("leagues", nargs='*',
+                        help="league ids (folders), default all leagues "
+                             "in the folder")
+    parser.add_argument("--folder", default='.',
+                        help="folder with folders of leagues")
+    parser.add_argument("--port", type=int, default=8080)
+    arguments = parser.parse_args()
+
+    read_server = ReadServer(arguments.leagues or None, arguments.folder,
+                             arguments.port)
+    print(f'Serving {len(read_server.store.league_ids())} leagues on '
+          f'{read_server.url}')
+    try:
+        read_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
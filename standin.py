@@ -0,0 +1,175 @@
+import os
+import time
+import socket
+import hashlib
+import struct
+import random
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real website
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        if not server.take_token():
+            self.send_page(429, b'Too Many Requests',
+                           retry_after=server.retry_after)
+            return
+        with server.busy() as running:
+            time.sleep(server.latency + server.slowdown * (running - 1))
+            self.answer()
+
+    def answer(self):
+        """send saved page, or simulated reset or error"""
+        server = self.server
+        roll = server.random.random()
+        if roll < server.resets:
+            self.reset_connection()
+            return
+        if roll < server.resets + server.errors:
+            self.send_page(503, b'Service Unavailable')
+            return
+
+        path = self.path.split('?')[0].strip('/')
+        file_path = os.path.join(server.folder, path, 'index.html')
+        if '..' in path.split('/') or not os.path.isfile(file_path):
+            self.send_page(404, b'Not Found')
+            return
+        with open(file_path, 'rb') as file:
+            body = file.read()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_page(304, b'', etag)
+        else:
+            self.send_page(200, body, etag)
+
+    def send_page(self, status: int, body: bytes, etag: str = None,
+                  retry_after: int = None) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def reset_connection(self) -> None:
+        """close socket with RST instead of FIN"""
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                   struct.pack('ii', 1, 0))
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass  # no line for each request
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local stand-in for https://fotbalunas.cz - http server for pages saved
+    in folder, where page /soutez/438/ is saved as folder/soutez/438/index.html
+    `latency` is seconds added to each request, `resets` and `errors` are
+    probabilities of reset connection and 503 response.
+    Overloaded website is simulated by `slowdown` - seconds added to each
+    request for each other request running at the same time, and by
+    `capacity` - requests per second, more requests get 429 response
+    with Retry-After `retry_after` seconds (0 - no limit).
+    """
+    daemon_threads = True
+
+    def __init__(self, folder: str, port: int = 0, latency: float = 0,
+                 resets: float = 0, errors: float = 0, seed: int = None,
+                 slowdown: float = 0, capacity: float = 0,
+                 retry_after: int = 1):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.folder = folder
+        self.latency = latency
+        self.resets = resets
+        self.errors = errors
+        self.random = random.Random(seed)
+        self.slowdown = slowdown
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.requests = self.throttled = self.running = 0
+        self.tokens = capacity
+        self.refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}'
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def take_token(self) -> bool:
+        """token bucket of `capacity` requests per second, False if empty"""
+        if not self.capacity:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + self.capacity *
+                              (now - self.refilled))
+            self.refilled = now
+            if self.tokens < 1:
+                self.throttled += 1
+                return False
+            self.tokens -= 1
+            return True
+
+    @contextmanager
+    def busy(self):
+        """count requests running at once, give their number"""
+        with self._lock:
+            self.running += 1
+            running = self.running
+        try:
+            yield running
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def start(self) -> 'StandInServer':
+        """serve in background thread, so it can be used inside of program"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Serve saved pages of fotbalunas.cz from FOLDER on localhost. Run scraper \
+    with '--site http://127.0.0.1:PORT' to scrape them.""")
+    parser.add_argument("folder")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0,
+                        help="seconds added to each request")
+    parser.add_argument("--resets", type=float, default=0,
+                        help="probability of reset connection")
+    parser.add_argument("--errors", type=float, default=0,
+                        help="probability of 503 response")
+    parser.add_argument("--slowdown", type=float, default=0,
+                        help="seconds added to request for each other "
+                             "request running at the same time")
+    parser.add_argument("--capacity", type=float, default=0,
+                        help="requests per second, more get 429 response")
+    parser.add_argument("--retry-after", type=int, default=1,
+                        help="seconds in Retry-After header of 429 response")
+    arguments = parser.parse_args()
+
+    stand_in = StandInServer(arguments.folder, arguments.port,
+                             arguments.latency, arguments.resets,
+                             arguments.errors, slowdown=arguments.slowdown,
+                             capacity=arguments.capacity,
+                             retry_after=arguments.retry_after)
+    print(f'Serving {arguments.folder} on {stand_in.url}')
+    try:
+        stand_in.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,375 @@
+import os
+import json
+import sqlite3
+import argparse
+import threading
+
+try:  # Parquet export is optional
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+PARQUET = pyarrow is not None  # Parquet export is possible
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS competitions (
+    competition_id INTEGER PRIMARY KEY,
+    competition_name TEXT,
+    season_name TEXT,
+    district TEXT,
+    region TEXT,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS teams (
+    team_id INTEGER PRIMARY KEY,
+    team_name TEXT
+);
+CREATE TABLE IF NOT EXISTS players (
+    player_id INTEGER PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    competition_id INTEGER,
+    round INTEGER,
+    datetime TEXT,
+    home_team_id INTEGER,
+    away_team_id INTEGER,
+    score TEXT,
+    half_time_score TEXT,
+    home_score INTEGER,
+    away_score INTEGER,
+    result_type TEXT
+);
+CREATE TABLE IF NOT EXISTS appearances (
+    match_id INTEGER,
+    team_id INTEGER,
+    position INTEGER,
+    player_id INTEGER,
+    role TEXT,
+    minutes INTEGER,
+    PRIMARY KEY (match_id, team_id, position)
+);
+CREATE TABLE IF NOT EXISTS goals (
+    match_id INTEGER,
+    position INTEGER,
+    player_id INTEGER,
+    minute INTEGER,
+    goal_type TEXT,
+    PRIMARY KEY (match_id, position)
+);
+CREATE TABLE IF NOT EXISTS cards (
+    match_id INTEGER,
+    position INTEGER,
+    player_id INTEGER,
+    minute INTEGER,
+    card TEXT,
+    PRIMARY KEY (match_id, position)
+);
+CREATE TABLE IF NOT EXISTS careers (
+    player_id INTEGER,
+    competition_id INTEGER,
+    appearances INTEGER DEFAULT 0,
+    starts INTEGER DEFAULT 0,
+    subs INTEGER DEFAULT 0,
+    minutes INTEGER DEFAULT 0,
+    goals INTEGER DEFAULT 0,
+    penalty_goals INTEGER DEFAULT 0,
+    own_goals INTEGER DEFAULT 0,
+    yellow_cards INTEGER DEFAULT 0,
+    red_cards INTEGER DEFAULT 0,
+    PRIMARY KEY (player_id, competition_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS matches_competition ON matches (competition_id);
+CREATE INDEX IF NOT EXISTS matches_datetime ON matches (datetime);
+CREATE INDEX IF NOT EXISTS matches_home_team ON matches (home_team_id);
+CREATE INDEX IF NOT EXISTS matches_away_team ON matches (away_team_id);
+CREATE INDEX IF NOT EXISTS appearances_player ON appearances (player_id);
+CREATE INDEX IF NOT EXISTS appearances_team ON appearances (team_id);
+CREATE INDEX IF NOT EXISTS goals_player ON goals (player_id);
+CREATE INDEX IF NOT EXISTS cards_player ON cards (player_id);
+"""
+
+TABLES = ("competitions", "teams", "players", "matches", "appearances",
+          "goals", "cards", "careers")
+
+# stats of careers: table they are counted from -> (column, SQL) pairs,
+# own goals are not in goals
+CAREER_STATS = {
+    "appearances": (("appearances", "COUNT(*)"),
+                    ("starts", "SUM(role = 'start')"),
+                    ("subs", "SUM(role = 'subs')"),
+                    ("minutes", "IFNULL(SUM(minutes), 0)")),
+    "goals": (("goals", "SUM(goal_type != 'own')"),
+              ("penalty_goals", "SUM(goal_type = 'penalty')"),
+              ("own_goals", "SUM(goal_type = 'own')")),
+    "cards": (("yellow_cards", "SUM(card = 'yellow')"),
+              ("red_cards", "SUM(card = 'red')")),
+}
+CAREER_COLUMNS = tuple(column for stats in CAREER_STATS.values()
+                       for column, _ in stats)
+
+MATCH_COLUMNS = ("match_id", "competition_id", "round", "datetime",
+                 "home_team_id", "away_team_id", "score", "half_time_score",
+                 "home_score", "away_score", "result_type")
+
+
+def upsert(table: str, columns: tuple, key: str) -> str:
+    """INSERT which updates the row, if the key is already there"""
+    updates = ', '.join(f'{column} = excluded.{column}'
+                        for column in columns if column != key)
+    return (f'INSERT INTO {table} ({", ".join(columns)}) '
+            f'VALUES ({", ".join("?" * len(columns))}) '
+            f'ON CONFLICT ({key}) DO UPDATE SET {updates}')
+
+
+def count_careers(table: str, where: str) -> str:
+    """
+    query which adds (:sign 1) or subtracts (:sign -1) stats of players
+    from rows of table (appearances, goals or cards) selected by where
+    to their careers. Competition is taken from the match.
+    """
+    stats = CAREER_STATS[table]
+    columns = ', '.join(column for column, _ in stats)
+    values = ', '.join(f':sign * {sql}' for _, sql in stats)
+    updates = ', '.join(f'{column} = {column} + excluded.{column}'
+                        for column, _ in stats)
+    return (f'INSERT INTO careers (player_id, competition_id, {columns}) '
+            f'SELECT player_id, competition_id, {values} FROM {table} '
+            f'JOIN matches USING (match_id) '
+            f'WHERE player_id IS NOT NULL AND {where} '
+            f'GROUP BY player_id, competition_id '
+            f'ON CONFLICT (player_id, competition_id) DO UPDATE SET {updates}')
+
+
+def number(value):
+    """id or minute from JSON (string) as int, None stays None"""
+    return None if value is None else int(value)
+
+
+class GameStore:
+    """
+    SQLite database with normalized tables of all scraped leagues:
+    competitions, teams, players, matches and appearances, goals and cards
+    of players in the matches. Teams and players are saved only once,
+    matches point to them by id. Saving the league again updates its rows,
+    so the database can keep many leagues and seasons.
+    Table careers has stats of each player in each competition. When
+    a match is saved, only its old stats are subtracted and the new ones
+    added, so careers are never counted again from all matches.
+    One store can be shared by more threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        empty = self.db.execute('SELECT 1 FROM careers LIMIT 1').fetchone()
+        if empty is None:  # database made before careers were added
+            self.rebuild_careers()
+
+    def rebuild_careers(self) -> None:
+        """count careers again from all appearances, goals and cards"""
+        with self._lock, self.db:
+            self.db.execute('DELETE FROM careers')
+            for table in CAREER_STATS:
+                self.db.execute(count_careers(table, '1'), {"sign": 1})
+
+    def _count_match(self, table: str, match_id: int, sign: int) -> None:
+        self.db.execute(count_careers(table, 'match_id = :match_id'),
+                        {"sign": sign, "match_id": match_id})
+
+    def save(self, basic_info: dict, games) -> None:
+        """upsert league from basic.json and games (dict from games.json)"""
+        with self._lock, self.db:
+            self._save_competition(basic_info)
+            team_ids = {team["team_name"]: number(team["team_id"])
+                        for team in basic_info["teams"]}
+            for match_info in games.values():
+                self._save_match(match_info, team_ids)
+
+    def _save_competition(self, basic_info: dict) -> None:
+        columns = ("competition_id", "competition_name", "season_name",
+                   "district", "region", "updated")
+        self.db.execute(upsert("competitions", columns, "competition_id"),
+                        [basic_info.get(column) for column in columns])
+        self.db.executemany(
+            upsert("teams", ("team_id", "team_name"), "team_id"),
+            [(number(team["team_id"]), team["team_name"])
+             for team in basic_info["teams"]])
+
+    def _save_match(self, match_info: dict, team_ids: dict) -> None:
+        match_id = match_info["match_id"]
+        # on 'results' level team ids are known only from the table page
+        home_id = number(match_info.get("home_team_id")) or \
+            team_ids.get(match_info["home_team"])
+        away_id = number(match_info.get("away_team_id")) or \
+            team_ids.get(match_info["away_team"])
+        row = dict(match_info, home_team_id=home_id, away_team_id=away_id)
+        self.db.execute(upsert("matches", MATCH_COLUMNS, "match_id"),
+                        [row[column] for column in MATCH_COLUMNS])
+        self.db.executemany(
+            upsert("teams", ("team_id", "team_name"), "team_id"),
+            [(team_id, name) for team_id, name in
+             ((home_id, match_info["home_team"]),
+              (away_id, match_info["away_team"])) if team_id is not None])
+
+        # lists of the match are replaced, if they were scraped this time
+        if "home_lineup" in match_info:
+            self._count_match("appearances", match_id, -1)
+            self.db.execute('DELETE FROM appearances WHERE match_id = ?',
+                            (match_id,))
+            for team_id, lineup in ((home_id, match_info["home_lineup"]),
+                                    (away_id, match_info["away_lineup"])):
+                self._save_players(lineup, update=True)
+                self.db.executemany(
+                    'INSERT INTO appearances VALUES (?, ?, ?, ?, ?, ?)',
+                    [(match_id, team_id, position, number(player["player_id"]),
+                      player["role"], player["minutes"])
+                     for position, player in enumerate(lineup)])
+            self._count_match("appearances", match_id, 1)
+        if "goals" in match_info:
+            self._count_match("goals", match_id, -1)
+            self._count_match("cards", match_id, -1)
+            self.db.execute('DELETE FROM goals WHERE match_id = ?',
+                            (match_id,))
+            self.db.execute('DELETE FROM cards WHERE match_id = ?',
+                            (match_id,))
+            self._save_players(match_info["goals"] + match_info["cards"])
+            self.db.executemany(
+                'INSERT INTO goals VALUES (?, ?, ?, ?, ?)',
+                [(match_id, position, number(goal["player_id"]),
+                  number(goal["minute"]), goal["goal_type"])
+                 for position, goal in enumerate(match_info["goals"])])
+            self.db.executemany(
+                'INSERT INTO cards VALUES (?, ?, ?, ?, ?)',
+                [(match_id, position, number(card["player_id"]),
+                  number(card["minute"]), card["card"])
+                 for position, card in enumerate(match_info["cards"])])
+            self._count_match("goals", match_id, 1)
+            self._count_match("cards", match_id, 1)
+
+    def _save_players(self, players: list, update: bool = False) -> None:
+        """
+        Names from lineups are the best ones, they update the saved name.
+        Names from goals and cards are saved only for new players.
+        Players without link (player_id None) are not saved.
+        """
+        rows = [(number(player["player_id"]), player["name"])
+                for player in players if player["player_id"] is not None]
+        if update:
+            query = upsert("players", ("player_id", "name"), "player_id")
+        else:
+            query = 'INSERT OR IGNORE INTO players VALUES (?, ?)'
+        self.db.executemany(query, rows)
+
+    def career(self, player_id) -> list:
+        """
+        stats of the player in each competition (league and season)
+        the player played in, as list of dicts, the newest season first
+        """
+        with self._lock:
+            cursor = self.db.execute(
+                'SELECT competition_id, competition_name, season_name, '
+                f'{", ".join(CAREER_COLUMNS)} FROM careers '
+                'LEFT JOIN competitions USING (competition_id) '
+                'WHERE player_id = ? ORDER BY season_name DESC, '
+                'competition_id', (number(player_id),))
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor]
+        return [row for row in rows
+                if any(row[column] for column in CAREER_COLUMNS)]
+
+    def top_players(self, stat: str = 'goals', n: int = 10,
+                    competition_id=None) -> list:
+        """
+        n players with the most of stat (column of careers, e.g. goals,
+        yellow_cards) in all competitions together, or in one of them
+        """
+        if stat not in CAREER_COLUMNS:
+            raise ValueError(f'unknown stat {stat}, use one of '
+                             f'{", ".join(CAREER_COLUMNS)}')
+        where, parameters = '', (n,)
+        if competition_id is not None:
+            where, parameters = 'WHERE competition_id = ?', (
+                number(competition_id), n)
+        with self._lock:
+            return [{"player_id": player_id, "name": name, stat: total}
+                    for player_id, name, total in self.db.execute(
+                        f'SELECT player_id, name, SUM({stat}) AS total '
+                        f'FROM careers LEFT JOIN players USING (player_id) '
+                        f'{where} GROUP BY player_id HAVING total > 0 '
+                        f'ORDER BY total DESC, player_id LIMIT ?',
+                        parameters)]
+
+    def export_parquet(self, folder: str) -> None:
+        """write each table into folder/<table>.parquet (needs pyarrow)"""
+        if not PARQUET:
+            raise RuntimeError("Parquet export needs pyarrow, "
+                               "install it with 'pip install pyarrow'")
+        os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            for table in TABLES:
+                cursor = self.db.execute(f'SELECT * FROM {table}')
+                columns = [column[0] for column in cursor.description]
+                rows = cursor.fetchall()
+                data = {column: [row[num] for row in rows]
+                        for num, column in enumerate(columns)}
+                pyarrow.parquet.write_table(pyarrow.table(data),
+                                            os.path.join(folder,
+                                                         table + '.parquet'))
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def load_league(folder: str) -> tuple:
+    """return (basic_info, games) from JSON files in folder of the league"""
+    with open(os.path.join(folder, 'basic.json')) as file:
+        basic_info = json.load(file)
+    with open(os.path.join(folder, 'games.json')) as file:
+        games = json.load(file)
+    return basic_info, games
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="""
+    Save leagues already scraped into JSON files into SQLite database. \
+    Leagues which are in the database already are updated. Print career \
+    of a player or the best players.""")
+    parser.add_argument("database")
+    parser.add_argument("folders", nargs='*',
+                        help="folders of leagues with basic.json and "
+                             "games.json")
+    parser.add_argument("--parquet", metavar="FOLDER",
+                        help="write all tables into Parquet files as well")
+    parser.add_argument("--player", metavar="PLAYER_ID",
+                        help="print stats of the player in each league")
+    parser.add_argument("--top", metavar="STAT", choices=CAREER_COLUMNS,
+                        help="print players with the most goals, "
+                             "yellow_cards, minutes, ...")
+    parser.add_argument("-n", type=int, default=10,
+                        help="number of players printed by --top")
+    parser.add_argument("--competition", help="--top only in this league")
+    arguments = parser.parse_args()
+
+    store = GameStore(arguments.database)
+    for league_folder in arguments.folders:
+        store.save(*load_league(league_folder))
+        print(f'League from {league_folder} saved')
+    if arguments.player:
+        for stats in store.career(arguments.player):
+            print(f'{stats["season_name"]} {stats["competition_name"]} '
+                  f'({stats["competition_id"]}): ' + ', '.join(
+                      f'{column} {stats[column]}'
+                      for column in CAREER_COLUMNS))
+    if arguments.top:
+        for num, player in enumerate(store.top_players(
+                arguments.top, arguments.n, arguments.competition), 1):
+            print(f'{num:3}. {player["name"] or player["player_id"]:30} '
+                  f'{player[arguments.top]}')
+    if arguments.parquet:
+        store.export_parquet(arguments.parquet)
+    store.close()
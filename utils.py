@@ -1,9 +1,42 @@
-import time
-import re
 import datetime
+from collections import deque, ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from client import Client, FetchError, default_client
+from journal import GameJournal, JournalGames
+from metrics import METRICS
+import lexer
+
+
+# BeautifulSoup backend, 'lxml' is much faster if installed
+HTML_PARSER = 'html.parser'
+
+# parts of pages the scraper uses, the rest of the page is not parsed at all
+LEAGUE_MENU = SoupStrainer('header')
+PAGE_CONTENT = SoupStrainer('div',
+                            {'id': 'content', 'class': 'inner-container'})
+
+
+def make_soup(content: bytes, parse_only: SoupStrainer = None):
+    """return BeautifulSoup of page content, or only of its part"""
+    return BeautifulSoup(content, HTML_PARSER, parse_only=parse_only)
+
+
+def make_match_soup(content: bytes, game: dict):
+    """
+    return BeautifulSoup of the part of match page with teams, lineups and
+    goals. If some of them is missing there, whole page is parsed.
+    """
+    soup = make_soup(content, PAGE_CONTENT)
+    if len(soup.find_all('h2')) < 2:
+        return make_soup(content)
+    if game["result_type"] != 'forfeit':
+        headings = {tag.get_text() for tag in soup.find_all('h4')}
+        if "Sestavy" not in headings or "Branky" not in headings:
+            return make_soup(content)
+    return soup
 
 
 def user_input_num_league() -> str:
@@ -22,11 +55,12 @@ def user_input_num_league() -> str:
             return id_league
 
 
-def check_response(link: str):
-    """return requests.Response() object, close program if RequestException appeared"""
+def check_response(link: str, client: Client = None, kind: str = 'page'):
+    """return requests.Response() object, close program if FetchError appeared"""
+    client = client or default_client()
     try:
-        r = requests.get(link)
-    except requests.exceptions.RequestException as e:
+        r = client.get(link, kind)
+    except FetchError as e:
         print(
             'Problem occurred during http request, please find more info bellow')
         print(str(e))
@@ -35,6 +69,14 @@ def check_response(link: str):
         return r
 
 
+def fetch_page(link: str, client: Client, fresh: bool = False):
+    """return response for match page or FetchError if download failed"""
+    try:
+        return client.get(link, 'match', fresh)
+    except FetchError as e:
+        return e
+
+
 def get_level_of_league(league_name: str) -> tuple:
     """
     depends on league name from website this function returns three items tuple
@@ -56,10 +98,18 @@ def get_level_of_league(league_name: str) -> tuple:
     return level, district, region
 
 
-def scrap_basic_info_league(link: str) -> dict:
+def scrap_basic_info_league(link: str, client: Client = None) -> dict:
     """scrapes basic data of the league and return a dictionary with league info"""
-    r = check_response(link)
-    soup = BeautifulSoup(r.content, 'html.parser')
+    r = check_response(link, client, 'table')
+    with METRICS.timer('parse.table'):
+        soup = make_soup(r.content, PAGE_CONTENT)
+    with METRICS.timer('extract.table'):
+        basic_info = get_basic_info(soup, link)
+    return basic_info
+
+
+def get_basic_info(soup, link: str) -> dict:
+    """return a dictionary with league info from the "Tabulka" page"""
     page_content = soup.find('div',
                              {'id': 'content', 'class': 'inner-container'})
 
@@ -69,7 +119,6 @@ def scrap_basic_info_league(link: str) -> dict:
     season = page_content.h2.text.replace('-', '/')  # YYYY/YYYY format
 
     print('Scrapping: ', league_name_string)
-    time.sleep(3)
 
     teams = []  # list of dicts
     tags_all_teams = page_content.table.find_all('a')
@@ -102,38 +151,16 @@ def clean_team_name(team_name: str) -> str:
     return name
 
 
-def scrap_games_in_league(link: str) -> dict:
+def get_schedule(soup, link: str) -> list:
     """
-    go through all the games in league.
-    Get all the basic info and open new link for each game to get more info.
-    Each game is saved in nested dictionary with match_id as key and following
-    key-value pairs.
-
-    {
-      "match_id",
-      "competition_id",
-      "round",
-      "datetime",
-      "home_team",
-      "away_team",
-      "home_team_id",
-      "away_team_id",
-      "score",
-      "half_time_score",
-      "home_score",
-      "away_score",
-      "result_type",
-      "home_lineup",
-      "away_lineup",
-      "cards",
-      "goals",
-    }
+    go through all the rounds on the schedule page and return list of dicts,
+    one dict for each match in the same order as on the page.
+    Cancelled matches and matches with unknown result are not scraped, these
+    dicts get only "match_id" and "skip" key with message for user.
+    Other dicts get basic info about the match and "link" to the match page.
     """
-    games = dict()
+    schedule = []  # list of dicts
     league_id = int(link.split('/')[-2])
-
-    r = check_response(link)
-    soup = BeautifulSoup(r.content, 'html.parser')
     parsed = urlparse(link)
     # not hardcoded "https://fotbalunas.cz"
     base_url = f'{parsed.scheme}://{parsed.netloc}'
@@ -141,7 +168,6 @@ def scrap_games_in_league(link: str) -> dict:
     page_content = soup.find('div',
                              {'id': 'content', 'class': 'inner-container'})
     rounds = page_content.find_all('div', {'class': 'panel panel-default'})
-    game_num = 0  # to give 3 second break after each 30 games
     for round in rounds:
         round_info = round.h3.text
         round_num = int(round_info.split(',')[0].strip().split('.')[0])
@@ -157,14 +183,17 @@ def scrap_games_in_league(link: str) -> dict:
 
             relative_link = tag.a['href']
             match_id = int(relative_link.split('/')[-2])
-            link = base_url + relative_link
 
             result_tag = match.find('td', {'class': 'zapas-item-vysledek'})
 
             score_date_tags = result_tag.find_all('a')
             if len(score_date_tags) <= 1:
-                print(f'Match {match_id} between '
-                      f'{home_team} and {away_team} was CANCELLED')
+                schedule.append({
+                    "match_id": match_id,
+                    "round": round_num,
+                    "cancelled": True,
+                    "skip": f'Match {match_id} between '
+                            f'{home_team} and {away_team} was CANCELLED'})
                 continue
 
             score_tag = score_date_tags[0]
@@ -178,13 +207,16 @@ def scrap_games_in_league(link: str) -> dict:
             m_minute = int(m_datetime[1].split(':')[1])
             match_datetime = datetime.datetime(year, m_month, m_day, m_hour,
                                                m_minute).isoformat()
+            unknown_result = (f"Match {match_id} between {home_team} and "
+                              f"{away_team} takes place {match_datetime} "
+                              f"UNKNOWN RESULT, NOT SAVED")
 
             # get full_time_score and half_time_score and type as nice strings
             ugly_score = score_tag.text.strip()
             if '%' in ugly_score:  # wrong input on HMTL result table
-                print(f"Match {match_id} between {home_team} and {away_team} "
-                      f"takes place {match_datetime}", end=' ')
-                print('UNKNOWN RESULT, NOT SAVED')
+                schedule.append({"match_id": match_id, "round": round_num,
+                                 "datetime": match_datetime,
+                                 "skip": unknown_result})
                 continue
             if 'kont' in ugly_score:  # game ended with forfeit
                 full_time_score = ugly_score.split('kont.')[0].strip()
@@ -202,292 +234,337 @@ def scrap_games_in_league(link: str) -> dict:
             away_score = full_time_score.split(':')[1].replace('p.', '').strip()
 
             if full_time_score.split(':')[0] == '-':
-                print(f"Match {match_id} between {home_team} and {away_team} "
-                      f"takes place {match_datetime}", end=' ')
-                print('UNKNOWN RESULT, NOT SAVED')
+                schedule.append({"match_id": match_id, "round": round_num,
+                                 "datetime": match_datetime,
+                                 "skip": unknown_result})
                 continue
 
-            game_num += 1
-            if game_num % 30 == 0:
-                print('next 30 games:')
-                time.sleep(3)
-
-            # ___open http link of this game to get more detailed info ___
-            r = check_response(link)
-            soup = BeautifulSoup(r.content, 'html.parser')
-
-            # get team names ind team ids
-            tag_teams = soup.find_all('h2')[:2]
-            tag_home_team = tag_teams[0].a
-            tag_away_team = tag_teams[1].a
-            home_team = tag_home_team.text
-            away_team = tag_away_team.text
-            home_id = tag_home_team["href"].split('/')[-2]
-            away_id = tag_away_team["href"].split('/')[-2]
-
-            if result_type == 'forfeit':  # no more info needed
-                home = away = cards = goals = []
-                print('Game bellow forfeited. No extra info needed.')
-            else:  # get lineups,goals and cards
-                tag_line_ups = soup.find('h4', text="Sestavy").find_parent()
-                sections = tag_line_ups.find_all('div')
-
-                # usually sections[0] is home_team lineup,
-                # sections[1] is away_team lineup
-                # sections[2] is about_cards
-                # but sometimes some sections are missing, so following loop
-                # connect sections with correct variable
-                div_home = div_away = div_cards = None
-                for section in sections:
-                    tag_strong = section.strong
-                    if not tag_strong:  # this part is missing
-                        continue
-                    if home_team in tag_strong:  # section belongs to home_team
-                        div_home = section
-                    elif away_team in tag_strong:  # section belongs to away_team
-                        div_away = section
-                    elif 'ŽK:' in tag_strong or 'ČK:' in tag_strong:  # to cards
-                        div_cards = section
-
-                try:
-                    home = get_players(home_team, div_home)
-                except IndexError:
-                    print(f'Unknown error by scraping {home_team} line up.')
-                    home = []
-                try:
-                    away = get_players(away_team, div_away)
-                except IndexError:
-                    print(f'Unknown error by scraping {away_team} line up.')
-                    away = []
-
-                cards = cards_received(div_cards)
-
-                tag_goals = soup.find('h4', text="Branky").find_parent()
-                goals = get_goal_scorer(tag_goals)
-
-            match_info = {
+            schedule.append({
                 "match_id": match_id,
                 "competition_id": league_id,
                 "round": round_num,
                 "datetime": match_datetime,
                 "home_team": home_team,
                 "away_team": away_team,
-                "home_team_id": home_id,
-                "away_team_id": away_id,
                 "score": full_time_score,
                 "half_time_score": half_time_score,
                 "result_type": result_type,
-                "home_score": int(home_score),
-                "away_score": int(away_score),
-                "home_lineup": home,
-                "away_lineup": away,
-                "cards": cards,
-                "goals": goals
-            }
-
-            games[match_id] = match_info
-
-            print(match_datetime,
-                  f"{home_team} vs {away_team} ended",
-                  f"{full_time_score}({half_time_score}). Match id:{match_id}",
-                  end='')
-            print('.Scraping OK')
-
-    print(f'Total of {game_num} games scrapped')
-    return games
-
-
-def nice_text(text: str) -> str:
-    """remove all tabs and newlines and '[-]' from text and strip it"""
-    text = re.sub(r"\s+", " ", text)
-    text = text.replace('[-]', '').strip()
-    return text
-
-
-def get_players_ids(tag) -> list:
-    """extract all players ids from tag"""
-    links = tag.find_all('a')
-    ids = [link['href'].split('/')[-2] for link in links]
-    return ids
+                "home_score": home_score,
+                "away_score": away_score,
+                "link": base_url + relative_link
+            })
+
+    return schedule
+
+
+def results_info(game: dict) -> dict:
+    """return info about the game from get_schedule() without its match page"""
+    match_info = {
+        "match_id": game["match_id"],
+        "competition_id": game["competition_id"],
+        "round": game["round"],
+        "datetime": game["datetime"],
+        "home_team": game["home_team"],
+        "away_team": game["away_team"],
+        "score": game["score"],
+        "half_time_score": game["half_time_score"],
+        "result_type": game["result_type"],
+        "home_score": int(game["home_score"]),
+        "away_score": int(game["away_score"]),
+    }
+    return match_info
 
 
-def match_card_info(ids: list, items: list, card_color: str) -> list:
+def get_match_sections(soup, home_team: str, away_team: str) -> tuple:
     """
-    match list with ids and list with card info,
-    and create list of dictionaries with complete card info
-    keys(player_id, name, minutes, card)
-     """
-    cards = []  # list of dict
-    for player_id, text in zip(ids, items):  # match each player id with card info
-
-        minute = re.search(r'(\d+)\.', text)
-        if not minute:  # on some games this info is missing
-            minute = '1'
-            name = text.strip()
-        else:
-            minute = minute.group(0).strip('.')
-            name = re.findall(r'\d+\.(.*)', text)[0].strip()
-        info = {'player_id': player_id,
-                'name': name,
-                'minute': minute,
-                'card': card_color
-                }
-        cards.append(info)
-    return cards
-
-
-def cards_received(tag) -> list:
+    return tags with home lineup, away lineup, cards and goals
+    from the match page. Missing lineups and cards are None.
     """
-    Separate text into yellow cards and red cards. Get all players ids.
-    Use match_card_info() to match cards with ids
-    Return list of dicts with info about all cards received in this game.
-    If no tag, return empty list.
+    tag_line_ups = soup.find('h4', text="Sestavy").find_parent()
+    sections = tag_line_ups.find_all('div')
+
+    # usually sections[0] is home_team lineup,
+    # sections[1] is away_team lineup
+    # sections[2] is about_cards
+    # but sometimes some sections are missing, so following loop
+    # connect sections with correct variable
+    div_home = div_away = div_cards = None
+    for section in sections:
+        tag_strong = section.strong
+        if not tag_strong:  # this part is missing
+            continue
+        if home_team in tag_strong:  # section belongs to home_team
+            div_home = section
+        elif away_team in tag_strong:  # section belongs to away_team
+            div_away = section
+        elif 'ŽK:' in tag_strong or 'ČK:' in tag_strong:  # to cards
+            div_cards = section
+
+    tag_goals = soup.find('h4', text="Branky").find_parent()
+    return div_home, div_away, div_cards, tag_goals
+
+
+def scrap_match_detail(soup, game: dict, level: str = 'full',
+                       warning=print) -> dict:
     """
-    if not tag:
-        return []
-
-    text = nice_text(tag.text)
-    text = re.sub(r" \.", "", text)  # remove dot on the end
+    get team ids, lineups, goals and cards from the match page
+    and return complete info about the game from get_schedule() as dict.
+    On 'events' level lineups are not scraped.
+    Problems with the page (missing lineup, forfeit) are passed to warning().
+    """
+    # get team names ind team ids
+    tag_teams = soup.find_all('h2')[:2]
+    tag_home_team = tag_teams[0].a
+    tag_away_team = tag_teams[1].a
+    home_team = tag_home_team.text
+    away_team = tag_away_team.text
+    home_id = tag_home_team["href"].split('/')[-2]
+    away_id = tag_away_team["href"].split('/')[-2]
+
+    if game["result_type"] == 'forfeit':  # no more info needed
+        home = away = cards = goals = []
+        warning('Game bellow forfeited. No extra info needed.')
+    else:  # get lineups,goals and cards
+        div_home, div_away, div_cards, tag_goals = get_match_sections(
+            soup, home_team, away_team)
+
+        home = away = []
+        if level == 'full':
+            with METRICS.timer('extract.lineups'):
+                home = lexer.lineup(home_team, div_home, warning)
+                away = lexer.lineup(away_team, div_away, warning)
+
+        with METRICS.timer('extract.cards'):
+            cards = lexer.cards(div_cards)
+
+        with METRICS.timer('extract.goals'):
+            goals = lexer.goals(tag_goals)
+
+    match_info = {
+        "match_id": game["match_id"],
+        "competition_id": game["competition_id"],
+        "round": game["round"],
+        "datetime": game["datetime"],
+        "home_team": home_team,
+        "away_team": away_team,
+        "home_team_id": home_id,
+        "away_team_id": away_id,
+        "score": game["score"],
+        "half_time_score": game["half_time_score"],
+        "result_type": game["result_type"],
+        "home_score": int(game["home_score"]),
+        "away_score": int(game["away_score"]),
+        "home_lineup": home,
+        "away_lineup": away,
+        "cards": cards,
+        "goals": goals
+    }
+    if level != 'full':
+        del match_info["home_lineup"], match_info["away_lineup"]
+    return match_info
 
-    yellow_cards_index = text.find('ŽK:')
-    red_cards_index = text.find('ČK:')
 
-    if red_cards_index == -1:  # no red cards in this game,only yellow
-        text = text[yellow_cards_index + 3:]
-        items_y = re.split('[-,]', text)
-        items_r = []
-    else:
-        if yellow_cards_index != -1:  # yellow and red cards
-            text_yellow = text[yellow_cards_index + 3:red_cards_index]
-            text_red = text[red_cards_index + 3:]
-            items_y = re.split('[-,]', text_yellow)
-            items_r = re.split('[,-]', text_red)
-        else:  # only red cards in this game
-            text = text[red_cards_index + 3:]
-            items_y = []
-            items_r = re.split('[,-]', text)
-
-    ids = get_players_ids(tag)  # list of ids
-    ids_y = ids[:len(items_y)]  # ids which belongs to items_y
-    ids_r = ids[len(items_y):]  # ids which belongs to item_r
-
-    yellows = match_card_info(ids_y, items_y, "yellow")
-    reds = match_card_info(ids_r, items_r, "red")
-    cards = yellows + reds
-    return cards
-
-
-def get_goal_scorer(tag) -> list:
+def fetch_pages(links, workers: int = 1, client: Client = None,
+                fresh_links=frozenset()):
     """
-    return list of all goal scorers as list of dicts
-    keys(player_id, name, minute, goal_type)
-    if no goals, return empty list
+    yield requests.Response() objects for all links in the same order,
+    or FetchError for the link which couldn't be downloaded.
+    Links in fresh_links are always downloaded, never taken from the cache.
+    With more than one worker, pages are downloaded in background threads,
+    but never more than `workers` pages are requested and not yet consumed.
+    When the generator is closed, pages not started yet are not requested.
     """
-    if not tag.div:  # no goals
-        return []
-
-    ids = get_players_ids(tag)
-    text = nice_text(tag.text).replace("Branky", '')
-    items = re.split("[-,]", text)
-
-    goals = []  # list of dicts
-    for player_id, text in zip(ids, items):  # match each goal with player id
-        # minute = re.findall('(\d+)\.',text)[0]
-        minute = re.search(r'(\d+)\.', text)
-        if not minute:  # on some games this info is missing
-            minute = '1'
-            name = text.strip()
-        else:
-            minute = minute.group(0).strip('.')
-            name = re.findall(r'\d+\.(.*)', text)[0].strip()
-
-        goal_type = 'regular'
-        if '(' in name:  # behind name is (p.) or (vl.)
-            name, goal_info = name.split('(')
-            name = name.strip()
-            if goal_info[0] == 'p':
-                goal_type = 'penalty'
-            elif goal_info[0] == 'v':
-                goal_type = 'own'
-            else:
-                goal_type = 'unknown'
+    client = client or default_client()
+    if workers <= 1:
+        for link in links:
+            yield fetch_page(link, client, link in fresh_links)
+        return
+
+    links = iter(links)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(fetch_page, link, client,
+                                        link in fresh_links)
+                        for link in islice(links, workers))
+        try:
+            while pending:
+                r = pending.popleft().result()
+                for link in islice(links, 1):  # keep `workers` pages in flight
+                    pending.append(executor.submit(fetch_page, link, client,
+                                                   link in fresh_links))
+                yield r
+        finally:  # consumer stopped early
+            for future in pending:
+                future.cancel()
+
+
+# keys of match info, which are scraped on each level beside results
+LEVEL_KEYS = {
+    "results": (),  # everything from the schedule page
+    "events": ("home_team_id", "away_team_id", "cards", "goals"),
+    "full": ("home_team_id", "away_team_id", "cards", "goals",
+             "home_lineup", "away_lineup"),
+}
+
+
+def is_saved(game: dict, saved_games: dict, level: str = 'full') -> bool:
+    """
+    True if game from get_schedule() is already in saved_games
+    with the same result and all keys of the level,
+    so its page doesn't have to be opened again
+    """
+    saved = saved_games.get(game["match_id"])
+    if not saved:
+        return False
+    return (all(saved[key] == game[key] for key in
+                ("score", "half_time_score", "result_type"))
+            and all(key in saved for key in LEVEL_KEYS[level]))
+
+
+def scrap_games_in_league(link: str, workers: int = 1,
+                          client: Client = None,
+                          saved_games: dict = None,
+                          level: str = 'full',
+                          journal: GameJournal = None,
+                          processes: int = 1) -> dict:
+    """
+    go through all the games in league.
+    Get all the basic info and open new link for each game to get more info.
+    Match pages are downloaded by `workers` threads, the result is the same
+    as with serial download. Game which page can't be downloaded is skipped.
+    Games from saved_games (e.g. loaded games.json) with unchanged result are
+    taken as they are, only new games and changed results are scraped.
+    Level decides what is scraped: 'results' only from the schedule page,
+    without opening match pages, 'events' adds team ids, goals and cards,
+    'full' adds lineups as well.
+    With GameJournal each game is written into it as soon as it is scraped
+    and games already in the journal (from stopped run) are not scraped again.
+    Returned games are then read from the journal, not kept in memory.
+    With more than one process (0 - one for each core), downloaded pages are
+    parsed in pool of processes while next pages are being downloaded.
+    Each game is saved in nested dictionary with match_id as key and following
+    key-value pairs.
 
-        info = {'player_id': player_id,
-                'name': name,
-                'minute': minute,
-                'goal_type': goal_type}
+    {
+      "match_id",
+      "competition_id",
+      "round",
+      "datetime",
+      "home_team",
+      "away_team",
+      "home_team_id",
+      "away_team_id",
+      "score",
+      "half_time_score",
+      "home_score",
+      "away_score",
+      "result_type",
+      "home_lineup",
+      "away_lineup",
+      "cards",
+      "goals",
+    }
+    """
+    games = dict()
+    saved_games = saved_games or {}
+    if journal is not None:
+        games = JournalGames(journal)
+        saved_games = ChainMap(journal, saved_games)
+    any_saved = bool(saved_games)  # journal grows during scraping
+
+    r = check_response(link, client, 'schedule')
+    schedule = read_schedule(r.content, link)
+    playable = [game for game in schedule if "skip" not in game]
+    saved_num = sum(is_saved(game, saved_games, level) for game in playable)
+    game_num = len(playable) - saved_num
+
+    for match_info in iter_games(schedule, workers, client, saved_games,
+                                 level, processes):
+        games[match_info["match_id"]] = match_info
+
+    # keep saved games, which are not on the schedule page any more
+    # or which page couldn't be downloaded this time
+    for match_id, match_info in saved_games.items():
+        games.setdefault(match_id, match_info)
+
+    if any_saved:
+        print(f'{saved_num} games were already saved with the same result')
+    print(f'Total of {game_num} games scrapped')
+    return games
 
-        goals.append(info)
 
-    return goals
+def read_schedule(content: bytes, link: str) -> list:
+    """parse schedule page downloaded from link and return get_schedule()"""
+    with METRICS.timer('parse.schedule'):
+        soup = make_soup(content, PAGE_CONTENT)
+    with METRICS.timer('extract.schedule'):
+        return get_schedule(soup, link)
 
 
-def get_players(team: str, tag) -> list:
+def iter_games(schedule: list, workers: int = 1, client: Client = None,
+               saved_games: dict = None, level: str = 'full',
+               processes: int = 1, progress=print, warning=print,
+               fresh: bool = False):
     """
-    Takes team_name and tag of names with lineups.
-    If no tag given, return empty list.
-    Clean up text of tag, so we got 11 items.
-    If item has two players (base + subs),separate them.
-    Make new dictionary of each player with keys(id,name,role,minutes)
-    return list of dictionaries
+    yield match_info of each game from get_schedule() as soon as it is
+    scraped, in the order of the schedule. Games from saved_games with
+    unchanged result are yielded as they are, without opening their page.
+    Pages of saved games with changed result (or of all games with fresh)
+    are downloaded again, never taken from the cache.
+    Game which page can't be downloaded is not yielded.
+    Messages for user are passed to progress() and warning().
+    Only pages of games in schedule are downloaded, so leave out games you
+    don't want. When the caller stops iterating, no more pages are requested.
     """
-    if not tag:
-        print(f'Missing line up for {team} in the game bellow.')
-        return []
-
-    team_name_official = tag.strong.text
-    text = nice_text(tag.text)
-    text = text.replace(team_name_official, "").strip()  # remove team_name
-    # separate text into 11 items
-    items = text.split(',')
-    top11 = []
-    # sometimes happened that players are not separated with ',' but with '-'
-    # this loop flatten the items list and players will remain in same order
-    for item in items:
-        persons = item.split('- ')
-        for person in persons:
-            person = person.strip()
-            if person:
-                top11.append(person)
-
-    if len(top11) < 7:
-        print(f'Less than 7 players on {team} side. ',
-              'Game supposed to be canceled')
-        return []
-
-    ids = get_players_ids(tag)  # list of ids
-
-    # Make new dictionary of each player with keys(id,name,role,minutes)
-    lineup = []  # list of dict
-    i = 0
-    for player in top11:
-        if player.find('(') == -1:  # player got not subs, he played all game
-            played = 90
-            role = 'start'
-            info = {'player_id': ids[i], 'name': player,
-                    'role': role, 'minutes': played}
-            lineup.append(info)
-            i += 1
-
-        else:  # player got subs, he played did not played 90 minutes
-            players = player.split('(')
-            subs_minute = re.findall(r'(\d+)\.', players[1])[0]
-            player = players[0].strip()  # base player
-            played = int(subs_minute)
-            role = 'start'
-            info = {'player_id': ids[i], 'name': player, 'role': role,
-                    'minutes': played}
-            lineup.append(info)
-            i += 1
-
-            player = players[1]  # subs player
-            player = player.replace(subs_minute, '').replace('.', '', 1)
-            player = player.replace(')', '').strip()
-            played = 90 - int(subs_minute)
-            role = 'subs'
-            info = {'player_id': ids[i], 'name': player, 'role': role,
-                    'minutes': played}
-            lineup.append(info)
-            i += 1
-
-    return lineup
+    saved_games = saved_games or {}
+    games_to_open = [game for game in schedule if level != 'results'
+                     and "skip" not in game
+                     and not is_saved(game, saved_games, level)]
+    fresh_links = {game["link"] for game in games_to_open
+                   if fresh or game["match_id"] in saved_games}
+    pages = fetch_pages((game["link"] for game in games_to_open), workers,
+                        client, fresh_links)
+    if processes != 1:
+        from pipeline import parse_pages
+        pages = parse_pages(games_to_open, pages, level, processes)
+    try:
+        for game in schedule:
+            if "skip" in game:
+                warning(game["skip"])
+                METRICS.count('cancelled' if game.get("cancelled")
+                              else 'skipped')
+                continue
+            if is_saved(game, saved_games, level):
+                METRICS.count('saved')
+                yield saved_games[game["match_id"]]
+                continue
+
+            if level == 'results':  # no need to open match page
+                match_info = results_info(game)
+            else:
+                # ___open http link of this game to get more detailed info ___
+                r = next(pages)
+                if isinstance(r, FetchError):
+                    warning(f"Match {game['match_id']} between "
+                            f"{game['home_team']} and {game['away_team']} "
+                            f"couldn't be downloaded ({r}) NOT SAVED")
+                    METRICS.count('failed')
+                    continue
+                if processes != 1:  # page is already parsed
+                    match_info, printed, process_metrics = r
+                    for line in printed.splitlines():
+                        warning(line)
+                    METRICS.merge(process_metrics)
+                else:
+                    with METRICS.timer('parse.match'):
+                        soup = make_match_soup(r.content, game)
+                    with METRICS.timer('extract.match'):
+                        match_info = scrap_match_detail(soup, game, level,
+                                                        warning)
+            METRICS.count('games')
+            progress(f"{match_info['datetime']} {match_info['home_team']} "
+                     f"vs {match_info['away_team']} ended "
+                     f"{match_info['score']}({match_info['half_time_score']})."
+                     f" Match id:{match_info['match_id']}.Scraping OK")
+            yield match_info
+    finally:
+        pages.close()
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import datetime
+import utils
+import api
+import scraper
+from client import Client, FetchError
+from metrics import METRICS
+
+# result is on the website usually about 2 hours after kickoff
+AFTER = datetime.timedelta(hours=2)
+# game without result or lineups is tried again after this time
+RETRY = datetime.timedelta(minutes=15)
+# game is not tried any more this long after kickoff
+GIVE_UP = datetime.timedelta(days=2)
+# schedule is downloaded at least this often, to see moved games
+IDLE = datetime.timedelta(days=1)
+
+
+def kickoff(entry: dict) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(entry["datetime"])
+
+
+def is_complete(match_info: dict, level: str = 'full') -> bool:
+    """
+    game has result and on 'full' level lineups of both teams, game
+    scraped on lower level before has no lineups, so it isn't complete
+    """
+    if level != 'full' or match_info["result_type"] == 'forfeit':
+        return True
+    return bool(match_info.get("home_lineup")
+                and match_info.get("away_lineup"))
+
+
+class LeagueWatch:
+    """
+    Schedule of one league and times of the last try of each game saved
+    in <league_id>/schedule.json, to find out which games are due, also
+    when each check is a new run of the program.
+    """
+
+    def __init__(self, id_league: str, client: Client, level: str = 'full',
+                 site: str = api.MAIN_LINK, after=AFTER, retry=RETRY,
+                 give_up=GIVE_UP):
+        self.id_league = id_league
+        self.client = client
+        self.site = site
+        self.level = level
+        self.after = after
+        self.retry = retry
+        self.give_up = give_up
+        self.path = os.path.join(id_league, 'schedule.json')
+        self.link = None  # of the schedule page
+        self.tries = {}  # match_id -> datetime of the last try
+        self.schedule = []
+        self.refreshed = None  # when the schedule was downloaded
+        if os.path.exists(self.path):
+            with open(self.path) as file:
+                saved = json.load(file)
+            if isinstance(saved, list):  # only schedule, from older version
+                saved = {"schedule": saved, "refreshed": datetime.datetime
+                         .fromtimestamp(os.path.getmtime(self.path))
+                         .isoformat()}
+            self.schedule = saved["schedule"]
+            self.refreshed = datetime.datetime.fromisoformat(
+                saved["refreshed"])
+            self.tries = {int(match_id): datetime.datetime.fromisoformat(
+                when) for match_id, when in saved.get("tries", {}).items()}
+
+    def save(self) -> None:
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump({
+                "refreshed": self.refreshed.isoformat(),
+                "tries": {match_id: when.isoformat()
+                          for match_id, when in self.tries.items()},
+                "schedule": self.schedule,
+            }, file, indent=4, ensure_ascii=False)
+        os.replace(self.path + '.tmp', self.path)
+
+    def refresh(self, now: datetime.datetime) -> None:
+        """download schedule page, never from the cache, and save it"""
+        if not self.link:
+            self.link = api.schedule_link(self.id_league, self.client,
+                                          self.site)
+        r = self.client.get(self.link, 'schedule', fresh=True)
+        self.schedule = utils.read_schedule(r.content, self.link)
+        self.refreshed = now
+        self.save()
+
+    def due_times(self, games: dict, now: datetime.datetime) -> dict:
+        """match_id -> when the game should be tried, for unfinished games"""
+        due = {}
+        for entry in self.schedule:
+            if "datetime" not in entry:  # cancelled game
+                continue
+            start = kickoff(entry)
+            if now > start + self.give_up:
+                continue
+            saved = games.get(entry["match_id"])
+            if saved and is_complete(saved, self.level):
+                continue
+            when = start + self.after
+            if entry["match_id"] in self.tries:
+                when = max(when, self.tries[entry["match_id"]] + self.retry)
+            due[entry["match_id"]] = when
+        return due
+
+    def check(self, now: datetime.datetime, store=None) -> datetime.datetime:
+        """
+        scrape games which are due, update JSON files (and store) with them
+        and return time when this league should be checked again
+        """
+        fresh = self.refreshed is not None and now - self.refreshed <= IDLE
+        if not fresh:
+            self.refresh(now)
+        games = scraper.load_games(self.id_league)
+        due = [match_id for match_id, when in
+               self.due_times(games, now).items() if when <= now]
+        if due:
+            if fresh:  # results are only on the schedule page
+                self.refresh(now)
+            self.tries = {match_id: when for match_id, when
+                          in self.tries.items() if now - when <= self.give_up}
+            for match_id in due:
+                self.tries[match_id] = now
+            self.save()
+            entries = [entry for entry in self.schedule
+                       if entry["match_id"] in due and "skip" not in entry]
+            saved = {match_id: game for match_id, game in games.items()
+                     if match_id not in due}
+            new = {match_info["match_id"]: match_info for match_info in
+                   utils.iter_games(entries, client=self.client,
+                                    saved_games=saved, level=self.level,
+                                    fresh=True)}
+            METRICS.count('watched_games', len(new))
+            print(f'League {self.id_league}: {len(due)} games due, '
+                  f'{len(new)} updated')
+            if new:
+                games.update(new)
+                with open(os.path.join(self.id_league, 'basic.json')) as file:
+                    basic_info = json.load(file)
+                scraper.create_jsons(self.id_league, basic_info, games)
+                if store:
+                    store.save(basic_info, new)
+        wake = min(self.due_times(games, now).values(),
+                   default=now + IDLE)
+        return min(wake, self.refreshed + IDLE)
+
+
+def watch_leagues(ids: list, client: Client, level: str = 'full',
+                  site: str = api.MAIN_LINK, store=None, once: bool = False,
+                  **times) -> None:
+    """
+    Keep checking leagues, scrape games when they are due and sleep
+    until the next one is due. times can change AFTER, RETRY and GIVE_UP
+    (after, retry, give_up). With once, leagues are checked only once.
+    """
+    watches = [LeagueWatch(id_league, client, level, site, **times)
+               for id_league in ids]
+    while True:
+        now = datetime.datetime.now()
+        wakes = []
+        for league in watches:
+            try:
+                wakes.append(league.check(now, store))
+            except FetchError as e:  # try again later
+                print(f'League {league.id_league}: {e}')
+                wakes.append(now + league.retry)
+        wake = min(wakes)
+        if once:
+            print(f'Next check at {wake:%Y-%m-%d %H:%M}')
+            return
+        print(f'Sleeping until {wake:%Y-%m-%d %H:%M}')
+        time.sleep(max(0.0, (wake - datetime.datetime.now()).total_seconds()))
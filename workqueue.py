@@ -0,0 +1,171 @@
+import json
+import time
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE,
+    kind TEXT,
+    payload TEXT,
+    state TEXT DEFAULT 'queued',
+    attempts INTEGER DEFAULT 0,
+    lease_until REAL,
+    worker TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, item_id);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class WorkItem:
+    """leased item of WorkQueue"""
+
+    def __init__(self, item_id: int, key: str, kind: str, payload: str,
+                 attempts: int, worker: str):
+        self.item_id = item_id
+        self.key = key
+        self.kind = kind
+        self.payload = json.loads(payload)
+        self.attempts = attempts
+        self.worker = worker
+
+
+class WorkQueue:
+    """
+    Queue of work items in SQLite database file, shared by coordinator
+    and any number of worker processes (on more machines the file has to
+    be on file system with working locks).
+    Worker leases an item for `lease` seconds. If it doesn't report
+    the result in time (it crashed or got stuck), the item is leased
+    to another worker - each item is processed at least once, maybe more
+    times, so processing has to give the same result again.
+    Item which failed `max_attempts` times is not leased any more.
+    Each key (e.g. 'match:1001') is put into the queue only once.
+    """
+
+    def __init__(self, path: str, lease: float = 120, max_attempts: int = 5):
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        # not WAL, it needs shared memory, so it works only on one computer
+        self.db.execute('PRAGMA journal_mode=DELETE')
+        self.db.executescript(SCHEMA)
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    def put(self, key: str, kind: str, payload) -> bool:
+        """add item, False if item with the key is there already"""
+        cursor = self.db.execute(
+            'INSERT OR IGNORE INTO items (key, kind, payload) '
+            'VALUES (?, ?, ?)', (key, kind, json.dumps(payload)))
+        return cursor.rowcount == 1
+
+    def put_many(self, items: list) -> None:
+        """add list of (key, kind, payload) in one transaction"""
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            self.db.executemany(
+                'INSERT OR IGNORE INTO items (key, kind, payload) '
+                'VALUES (?, ?, ?)', [(key, kind, json.dumps(payload))
+                                     for key, kind, payload in items])
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    def lease_item(self, worker: str) -> WorkItem:
+        """lease the oldest free item to worker, None if there is none"""
+        now = time.time()
+        self.db.execute('BEGIN IMMEDIATE')  # no other worker can lease now
+        try:
+            # worker of the last attempt crashed, don't try it any more
+            self.db.execute(
+                "UPDATE items SET state = 'failed', "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE state = 'leased' AND lease_until < ? "
+                "AND attempts >= ?", (now, self.max_attempts))
+            row = self.db.execute(
+                "SELECT item_id, key, kind, payload, attempts FROM items "
+                "WHERE state = 'queued' "
+                "OR (state = 'leased' AND lease_until < ?) "
+                "ORDER BY item_id LIMIT 1", (now,)).fetchone()
+            if row:
+                self.db.execute(
+                    "UPDATE items SET state = 'leased', lease_until = ?, "
+                    "worker = ?, attempts = attempts + 1 WHERE item_id = ?",
+                    (now + self.lease, worker, row[0]))
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+        if not row:
+            return None
+        item_id, key, kind, payload, attempts = row
+        return WorkItem(item_id, key, kind, payload, attempts + 1, worker)
+
+    def complete(self, item: WorkItem, result) -> None:
+        """save result of the item, also when its lease timed out already"""
+        self.db.execute(
+            "UPDATE items SET state = 'done', result = ?, error = NULL "
+            "WHERE item_id = ? AND state != 'done'",
+            (json.dumps(result, ensure_ascii=False), item.item_id))
+
+    def fail(self, item: WorkItem, error: str) -> None:
+        """give the item back, or mark it failed after too many attempts"""
+        state = 'failed' if item.attempts >= self.max_attempts else 'queued'
+        self.db.execute(
+            "UPDATE items SET state = ?, error = ? "
+            "WHERE item_id = ? AND state = 'leased' AND worker = ?",
+            (state, error, item.item_id, item.worker))
+
+    def result(self, key: str):
+        """result of done item, or None"""
+        row = self.db.execute(
+            "SELECT result FROM items WHERE key = ? AND state = 'done'",
+            (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def results(self, kind: str) -> dict:
+        """key -> result of done items of the kind"""
+        return {key: json.loads(result) for key, result in self.db.execute(
+            "SELECT key, result FROM items WHERE kind = ? AND state = 'done'",
+            (kind,))}
+
+    def failed(self) -> dict:
+        """key -> error of failed items"""
+        return dict(self.db.execute(
+            "SELECT key, error FROM items WHERE state = 'failed'"))
+
+    def counts(self) -> dict:
+        """number of items in each state"""
+        return dict(self.db.execute(
+            'SELECT state, COUNT(*) FROM items GROUP BY state'))
+
+    def unfinished(self) -> int:
+        """number of items which are queued or leased"""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM items WHERE state IN ('queued', 'leased')"
+        ).fetchone()[0]
+
+    def finish(self, finished: bool = True) -> None:
+        """
+        no more items will be added, workers can end when the queue is empty.
+        finish(False) when coordinator starts adding items again
+        """
+        if finished:
+            self.db.execute("INSERT OR REPLACE INTO meta "
+                            "VALUES ('finished', '1')")
+        else:
+            self.db.execute("DELETE FROM meta WHERE name = 'finished'")
+
+    def finished(self) -> bool:
+        row = self.db.execute(
+            "SELECT 1 FROM meta WHERE name = 'finished'").fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        self.db.close()